@@ -0,0 +1,53 @@
+"""
+Time the python and numpy conflict engines on one large calendar. Parity
+between the engines is covered by tests/test_conflict_engines.py; this only
+checks that the timed runs returned the same conflicts and exits with status
+1 if they did not.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_conflict_engines [--events 200000] [--iso] [--repeat 3] [--seed 42]
+"""
+import argparse
+import gc
+import json
+import sys
+
+from benchmarks.generators import detector_events, make_calendar
+from benchmarks.timing import best_of
+from utils.conflict_detector import ConflictDetector
+
+def comparable(conflicts):
+    """Conflicts without the detection timestamp, which differs between runs"""
+    return [conflict.model_dump(exclude={"detected_at"}) for conflict in conflicts]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the python and numpy conflict engines")
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--overlap", type=float, default=0.2)
+    parser.add_argument("--iso", action="store_true", help="Store times as ISO strings instead of datetimes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    events = detector_events(make_calendar(args.events, overlap=args.overlap, seed=args.seed), args.iso)
+    gc.freeze()
+    python_engine, numpy_engine = ConflictDetector(engine="python"), ConflictDetector(engine="numpy")
+    # The untimed runs produce the results to compare and warm up both engines
+    expected = python_engine.detect_conflicts(events, "bench")
+    actual = numpy_engine.detect_conflicts(events, "bench")
+    python_seconds = best_of(lambda: python_engine.detect_conflicts(events, "bench"), args.repeat)
+    numpy_seconds = best_of(lambda: numpy_engine.detect_conflicts(events, "bench"), args.repeat)
+    matches = comparable(expected) == comparable(actual)
+
+    print(json.dumps({
+        "events": args.events,
+        "conflicts": len(expected),
+        "python_seconds": round(python_seconds, 3),
+        "numpy_seconds": round(numpy_seconds, 3),
+        "results_match": matches
+    }, indent=2))
+    if not matches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark ConflictDetector._detect_time_overlaps (single sweep over pre-parsed
+timestamps) against the previous adjacent-pair scan on a calendar from
+benchmarks.generators, and check that every overlapping pair ends up in the
+same reported cluster.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_conflict_overlaps [--events 1000000] [--overlap 0.2] [--iso] [--repeat 3] [--seed 42]
+"""
+import argparse
+import gc
+import json
+from datetime import datetime
+from typing import Any, Dict, List
+
+from benchmarks.generators import detector_events, make_calendar
+from benchmarks.timing import best_of
+from models.agent_models import ConflictDetection
+from utils.conflict_detector import ConflictDetector, _utc_naive
+
+def legacy_adjacent_overlaps(detector: ConflictDetector, events: List[Dict[str, Any]], user_id: str) -> List[ConflictDetection]:
+    """The previous algorithm: compare each event only with the next one, re-parsing every time"""
+    conflicts = []
+    events = sorted(events, key=lambda x: x["start"])
+    for i in range(len(events) - 1):
+        current_event = events[i]
+        next_event = events[i + 1]
+        current_end = current_event["end"]
+        next_start = next_event["start"]
+        if isinstance(current_end, str):
+            current_end = datetime.fromisoformat(current_end.replace("Z", "+00:00"))
+        if isinstance(next_start, str):
+            next_start = datetime.fromisoformat(next_start.replace("Z", "+00:00"))
+        if current_end > next_start:
+            conflicts.append(ConflictDetection(
+                conflict_id=f"overlap_{current_event['id']}_{next_event['id']}",
+                user_id=user_id,
+                conflict_type="time_overlap",
+                affected_events=[current_event["id"], next_event["id"]],
+                severity="high",
+                detected_at=datetime.utcnow(),
+                suggested_resolution={
+                    "type": "reschedule",
+                    "options": [
+                        {"action": "move_second_event", "new_start": current_end + detector.buffer_time,
+                         "reason": "Move second event to avoid overlap"},
+                        {"action": "shorten_first_event", "new_end": next_start - detector.buffer_time,
+                         "reason": "Shorten first event to avoid overlap"}
+                    ]
+                }
+            ))
+    return conflicts
+
+def check_clusters(events: List[Dict[str, Any]], conflicts, legacy_conflicts, sample: int = 3000) -> Dict[str, int]:
+    """
+    Brute-force check on a prefix of the timeline: overlapping pairs must share
+    a cluster. Also counts the overlapping pairs the legacy scan never reported.
+    """
+    legacy_pairs = {tuple(sorted(conflict.affected_events)) for conflict in legacy_conflicts}
+    cluster_of = {}
+    for number, conflict in enumerate(conflicts):
+        for event_id in conflict.affected_events:
+            cluster_of[event_id] = number
+    ordered = sorted(events, key=lambda event: _utc_naive(event["start"]))[:sample]
+    parsed = [(_utc_naive(event["start"]), _utc_naive(event["end"]), event["id"]) for event in ordered]
+    pairs = missed = legacy_missed = 0
+    for i, (start_a, end_a, id_a) in enumerate(parsed):
+        for start_b, end_b, id_b in parsed[i + 1:]:
+            if start_b >= end_a:
+                break
+            pairs += 1
+            if id_a not in cluster_of or cluster_of.get(id_a) != cluster_of.get(id_b):
+                missed += 1
+            if tuple(sorted((id_a, id_b))) not in legacy_pairs:
+                legacy_missed += 1
+    return {"checked_pairs": pairs, "pairs_outside_a_cluster": missed, "pairs_legacy_did_not_report": legacy_missed}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark overlap detection")
+    parser.add_argument("--events", type=int, default=1000000)
+    parser.add_argument("--overlap", type=float, default=0.2)
+    parser.add_argument("--iso", action="store_true", help="Store times as ISO strings instead of datetimes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    events = detector_events(make_calendar(args.events, overlap=args.overlap, seed=args.seed), args.iso)
+    # Keep collector passes over the fixture itself out of the timings
+    gc.freeze()
+    detector = ConflictDetector()
+
+    # The untimed runs produce the results to check and warm up both paths
+    conflicts = detector._detect_time_overlaps(events, "bench")
+    legacy_conflicts = legacy_adjacent_overlaps(detector, events, "bench")
+    sweep_seconds = best_of(lambda: detector._detect_time_overlaps(events, "bench"), args.repeat)
+    legacy_seconds = best_of(lambda: legacy_adjacent_overlaps(detector, events, "bench"), args.repeat)
+
+    results = {
+        "events": args.events,
+        "sweep": {
+            "seconds": round(sweep_seconds, 3),
+            "clusters": len(conflicts),
+            "events_in_clusters": sum(len(conflict.affected_events) for conflict in conflicts),
+            "largest_cluster": max((len(conflict.affected_events) for conflict in conflicts), default=0)
+        },
+        "legacy_adjacent_pairs": {
+            "seconds": round(legacy_seconds, 3),
+            "reported_pairs": len(legacy_conflicts)
+        },
+        "check": check_clusters(events, conflicts, legacy_conflicts)
+    }
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Compare the EventDB validation path with the trusted-read orjson path used
+by GET /api/events and /api/agenda.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_event_serialization [--events 10000] [--repeat 5] [--seed 42]
+"""
+import argparse
+import json
+from datetime import timezone
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks.generators import make_calendar
+from benchmarks.timing import best_of
+from models.schema import EventDB
+from utils.serialization import EventJSONResponse, serialize_event_documents
+
+def validated_path(documents: List[dict]) -> bytes:
+    """What the endpoints did before: EventDB per document, then response_model encoding"""
+    events = []
+    for document in documents:
+        document = dict(document)
+        document["_id"] = str(document["_id"])
+        document["start"] = document["start"].replace(tzinfo=timezone.utc)
+        document["end"] = document["end"].replace(tzinfo=timezone.utc)
+        events.append(EventDB(**document))
+    return json.dumps(jsonable_encoder(events, by_alias=True)).encode("utf-8")
+
+def trusted_path(documents: List[dict]) -> bytes:
+    return EventJSONResponse(content=serialize_event_documents(documents)).body
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark event list serialization")
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    documents = make_calendar(args.events, seed=args.seed)
+    results = {}
+    for name, func in (("validated", validated_path), ("trusted_orjson", trusted_path)):
+        seconds = best_of(lambda: func(documents), args.repeat)
+        results[name] = {
+            "seconds": round(seconds, 4),
+            "events_per_second": round(args.events / seconds),
+            "payload_bytes": len(func(documents))
+        }
+    results["speedup"] = round(results["validated"]["seconds"] / results["trusted_orjson"]["seconds"], 1)
+    print(json.dumps({"events": args.events, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Seeded synthetic data for the benchmarks: calendars shaped like stored
+event documents and mailboxes shaped like stored emails. The same arguments
+always produce the same data, so runs on different commits are comparable.
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from bson import ObjectId
+
+CALENDAR_START = datetime(2026, 1, 5, 9)  # a Monday
+
+def make_calendar(count: int, density: float = 6.0, overlap: float = 0.1, attendees: int = 200,
+                  seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    `count` events over as many weekdays as `density` (meetings per day) needs.
+    Each day's meetings run from 09:00 with gaps of 0-60 minutes; a fraction
+    `overlap` of them starts inside the previous meeting instead. Start/end are
+    naive UTC datetimes, as BSON dates come back from the driver.
+    """
+    rng = random.Random(seed)
+    documents = []
+    day = CALENDAR_START
+    while len(documents) < count:
+        if day.weekday() < 5:
+            cursor = day
+            previous_start = None
+            for _ in range(min(count - len(documents), max(1, round(rng.gauss(density, density / 4))))):
+                duration = timedelta(minutes=rng.choice([15, 30, 30, 45, 60, 60, 90]))
+                if previous_start is not None and rng.random() < overlap:
+                    start = previous_start + timedelta(minutes=rng.choice([5, 10, 15]))
+                else:
+                    start = cursor + timedelta(minutes=rng.choice([0, 5, 10, 15, 30, 60]))
+                end = start + duration
+                cursor = max(cursor, end)
+                previous_start = start
+                documents.append({
+                    "_id": ObjectId(f"{seed % 2 ** 32:08x}{len(documents):016x}"),
+                    "title": f"Meeting {len(documents)}",
+                    "start": start,
+                    "end": end,
+                    "allDay": False,
+                    "meetingLink": "https://meet.example.com/abc-defg-hij",
+                    "meetingDescription": "Weekly sync on roadmap, hiring and open incidents.",
+                    "attendees": [f"user{rng.randrange(attendees)}@example.com" for _ in range(rng.randrange(1, 8))],
+                    "reminders": [10],
+                    "recurrence": None,
+                    "summaryPoints": [],
+                    "status": "upcoming",
+                    "cardColor": None,
+                    "agendaOrder": len(documents) + 1,
+                    "version": len(documents) + 1,
+                    "createdVersion": len(documents) + 1
+                })
+        day = day.replace(hour=9, minute=0) + timedelta(days=1)
+    return documents
+
+def detector_events(documents: List[Dict[str, Any]], iso: bool = False) -> List[Dict[str, Any]]:
+    """Calendar documents in the {id, start, end} form ConflictDetector takes"""
+    if iso:
+        return [
+            {"id": str(document["_id"]), "start": document["start"].isoformat() + "Z", "end": document["end"].isoformat() + "Z"}
+            for document in documents
+        ]
+    return [{"id": str(document["_id"]), "start": document["start"], "end": document["end"]} for document in documents]
+
+SUBJECTS = [
+    "Meeting to schedule the Q3 review", "URGENT: production issue needs attention",
+    "Quick question about the budget", "Thank you for the great presentation",
+    "FYI: weekly update", "Task: complete the onboarding checklist",
+    "Complaint about delayed delivery", "Lunch on Friday?", "Important: deadline moved",
+    "Re: project notes"
+]
+BODY_SENTENCES = [
+    "Can we find a time for a call next week?", "Please complete the action items by Thursday.",
+    "Could you help clarify the requirements?", "This is critical and needs a fix asap.",
+    "Great work on the launch, congratulations to the team.", "Here is the latest info on the rollout.",
+    "There is a problem with the invoice total.", "Let me know if the schedule works for you.",
+    "No action needed, just keeping you posted.", "The appointment has been confirmed."
+]
+
+def make_mailbox(count: int, recipient: str = "user0@example.com", senders: int = 300,
+                 seed: int = 42) -> List[Dict[str, Any]]:
+    """`count` emails shaped like db.emails documents, mixing every keyword category"""
+    rng = random.Random(seed)
+    received = datetime(2026, 1, 5, 8)
+    emails = []
+    for index in range(count):
+        body = " ".join(rng.choice(BODY_SENTENCES) for _ in range(rng.randint(2, 12)))
+        received += timedelta(seconds=rng.randint(30, 3600))
+        emails.append({
+            "message_id": f"msg{seed}-{index:08d}",
+            "thread_id": f"thread{seed}-{index // 4:08d}",
+            "subject": rng.choice(SUBJECTS),
+            "sender": f"sender{rng.randrange(senders)}@example.org",
+            "recipient": recipient,
+            "body": body,
+            "snippet": body[:120],
+            "timestamp": received,
+            "is_read": rng.random() < 0.6,
+            "labels": ["INBOX"],
+            "attachments": []
+        })
+    return emails
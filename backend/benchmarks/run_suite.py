@@ -0,0 +1,249 @@
+"""
+Repeatable benchmark suite for the calendar hot paths, saved as JSON so runs
+on different commits can be compared.
+
+Micro benchmarks time pure functions on seeded data:
+ConflictDetector (python and numpy engines, datetime and ISO inputs), the
+GET /api/events conversion (serialize_event_documents + orjson) against
+EventDB validation, interval-tree builds and YellowAgent._extract_email_context.
+
+Macro benchmarks seed a store and drive the API in-process (httpx
+ASGITransport, no server): full keyset pagination, a one-week window, the
+agenda cold and cached, free/busy, slot search and checked creates.
+--store memory uses mongomock-motor as an in-memory stand-in; --store mongo
+uses MONGO_URI with a throwaway database; --store none skips macro runs.
+The stand-in has no query planner or indexes, so its macro numbers track
+application overhead; compare query costs on a local MongoDB.
+
+Usage (from the backend directory):
+    python -m benchmarks.run_suite [--sizes 1000,10000,100000] [--emails 5000] [--store memory]
+        [--repeat 3] [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from benchmarks.generators import CALENDAR_START, detector_events, make_calendar, make_mailbox
+from benchmarks.timing import best_of, best_of_async
+
+BENCHMARK_DATABASE = os.getenv("BENCHMARK_DATABASE", "calendar_benchmarks")
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def use_store(store: str):
+    """Point database.db at the benchmark store; must run before app modules are imported"""
+    import database
+    if store == "memory":
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("--store memory needs mongomock-motor (pip install mongomock-motor)")
+        database.client = AsyncMongoMockClient()
+    elif store == "mongo":
+        from motor.motor_asyncio import AsyncIOMotorClient
+        database.client = AsyncIOMotorClient(database.MONGO_URI)
+    else:
+        return
+    database.db = database.client[BENCHMARK_DATABASE]
+    database.events_collection = database.db.events
+
+
+def record(results: List[Dict[str, Any]], kind: str, name: str, size: int, seconds: float, operations: int):
+    results.append({
+        "kind": kind,
+        "name": name,
+        "size": size,
+        "seconds": round(seconds, 6),
+        "ops_per_second": round(operations / seconds, 1) if seconds else None
+    })
+    print(f"{kind:5} {name:32} {size:>9} {seconds * 1000:12.2f} ms", file=sys.stderr)
+
+
+def run_micro(sizes: List[int], emails: int, repeat: int, args) -> List[Dict[str, Any]]:
+    from benchmarks.bench_event_serialization import trusted_path, validated_path
+    from utils.conflict_detector import ConflictDetector
+    from utils.interval_index import IntervalTree
+    from agents.yellow_agent import YellowAgent
+
+    results = []
+    for size in sizes:
+        documents = make_calendar(size, args.density, args.overlap, seed=args.seed)
+        events, iso_events = detector_events(documents), detector_events(documents, iso=True)
+        for engine in ("python", "numpy"):
+            detector = ConflictDetector(engine=engine)
+            record(results, "micro", f"conflicts.{engine}", size,
+                   best_of(lambda: detector.detect_conflicts(events, "bench"), repeat), size)
+            record(results, "micro", f"conflicts.{engine}_iso", size,
+                   best_of(lambda: detector.detect_conflicts(iso_events, "bench"), repeat), size)
+        record(results, "micro", "events.serialize_orjson", size, best_of(lambda: trusted_path(documents), repeat), size)
+        if size <= args.validate_max:
+            record(results, "micro", "events.validate_eventdb", size, best_of(lambda: validated_path(documents), repeat), size)
+        intervals = [(document["start"].timestamp(), document["end"].timestamp(), str(document["_id"])) for document in documents]
+        record(results, "micro", "freebusy.tree_build", size, best_of(lambda: IntervalTree.build(intervals), repeat), size)
+        del documents, events, iso_events, intervals
+
+    if emails:
+        mailbox = make_mailbox(emails, seed=args.seed)
+        agent = YellowAgent()
+
+        async def extract_all():
+            for email in mailbox:
+                await agent._extract_email_context(email)
+
+        record(results, "micro", "email.extract_context", emails, best_of(lambda: asyncio.run(extract_all()), repeat), emails)
+    return results
+
+
+async def run_macro(sizes: List[int], repeat: int, args) -> List[Dict[str, Any]]:
+    import httpx
+    import database
+    import main
+    from utils.change_version import EVENTS_VERSION_SEQUENCE
+    from utils.sequence import AGENDA_ORDER_SEQUENCE, seed_sequence
+
+    # One log line per request would swamp the timings
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    results = []
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def get(path: str, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+            response = await client.get(path, params=params)
+            # A failing endpoint must not pass as a fast one
+            response.raise_for_status()
+            return response
+
+        for size in sizes:
+            await database.client.drop_database(BENCHMARK_DATABASE)
+            main.agenda_cache.clear()
+            main.freebusy_index._trees.clear()
+            if args.store == "mongo":
+                await database.connect_to_mongo()
+            documents = make_calendar(size, args.density, args.overlap, seed=args.seed)
+
+            started = time.perf_counter()
+            for offset in range(0, size, 10000):
+                await database.db.events.insert_many(documents[offset:offset + 10000])
+            record(results, "macro", "store.seed", size, time.perf_counter() - started, size)
+            # The generator numbers agendaOrder and version 1..size
+            for sequence in (AGENDA_ORDER_SEQUENCE, EVENTS_VERSION_SEQUENCE):
+                await seed_sequence(sequence, size)
+            first_day = CALENDAR_START.replace(hour=0)
+            week = {"from": first_day.isoformat() + "Z", "to": (first_day + timedelta(days=7)).isoformat() + "Z"}
+            fortnight = {"from": week["from"], "to": (first_day + timedelta(days=14)).isoformat() + "Z"}
+            attendees = [f"user{index}@example.com" for index in range(5)]
+
+            async def list_all():
+                cursor = None
+                while True:
+                    params = {"limit": 5000, **({"cursor": cursor} if cursor else {})}
+                    response = await get("/api/events", params)
+                    cursor = response.headers.get("x-next-cursor")
+                    if not cursor:
+                        return
+
+            record(results, "macro", "api.events_list_all", size, await best_of_async(list_all, repeat), size)
+            record(results, "macro", "api.events_week", size,
+                   await best_of_async(lambda: get("/api/events", week), repeat), 1)
+
+            main.agenda_cache.clear()
+            record(results, "macro", "api.agenda_cold", size, await best_of_async(lambda: get("/api/agenda"), 1), 1)
+            record(results, "macro", "api.agenda_cached", size, await best_of_async(lambda: get("/api/agenda"), repeat), 1)
+
+            record(results, "macro", "api.freebusy_cold", size,
+                   await best_of_async(lambda: get("/api/freebusy", fortnight), 1), 1)
+            record(results, "macro", "api.freebusy_indexed", size,
+                   await best_of_async(lambda: get("/api/freebusy", fortnight), repeat), 1)
+            record(results, "macro", "api.slots_5_attendees", size, await best_of_async(
+                lambda: get("/api/slots", {**fortnight, "attendees": attendees, "duration": 60}), repeat
+            ), 1)
+
+            async def create_checked():
+                for index in range(50):
+                    start = first_day + timedelta(days=index % 10, hours=10, minutes=15 * (index % 4))
+                    response = await client.post("/api/events", params={"check_conflicts": "true"}, json={
+                        "title": f"Checked {index}",
+                        "start": start.isoformat() + "Z",
+                        "end": (start + timedelta(minutes=30)).isoformat() + "Z"
+                    })
+                    response.raise_for_status()
+
+            record(results, "macro", "api.create_checked_x50", size, await best_of_async(create_checked, 1), 50)
+            del documents
+    await database.client.drop_database(BENCHMARK_DATABASE)
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(__file__)
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results: List[Dict[str, Any]], baseline_path: str):
+    """Print each benchmark's time relative to a previous results file"""
+    with open(baseline_path) as baseline_file:
+        baseline = {(item["kind"], item["name"], item["size"]): item["seconds"] for item in json.load(baseline_file)["results"]}
+    print(f"{'benchmark':40} {'size':>9} {'baseline ms':>12} {'now ms':>12} {'ratio':>7}", file=sys.stderr)
+    for item in results:
+        before = baseline.get((item["kind"], item["name"], item["size"]))
+        if before:
+            print(f"{item['kind'] + '.' + item['name']:40} {item['size']:>9} {before * 1000:12.2f} "
+                  f"{item['seconds'] * 1000:12.2f} {item['seconds'] / before:7.2f}", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the calendar benchmark suite")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Calendar sizes, comma separated (up to 1000000)")
+    parser.add_argument("--macro-sizes", default="1000,10000", help="Calendar sizes seeded into the store")
+    parser.add_argument("--emails", type=int, default=5000, help="Mailbox size for the email benchmarks (0 to skip)")
+    parser.add_argument("--density", type=float, default=6.0, help="Meetings per weekday")
+    parser.add_argument("--overlap", type=float, default=0.1, help="Share of meetings starting inside the previous one")
+    parser.add_argument("--validate-max", type=int, default=100000, help="Largest size to run EventDB validation on")
+    parser.add_argument("--store", choices=["memory", "mongo", "none"], default="memory")
+    parser.add_argument("--only", choices=["micro", "macro"], default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Results file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", default=None, help="Previous results file to compare against")
+    args = parser.parse_args()
+
+    use_store(args.store)
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    macro_sizes = [int(size) for size in args.macro_sizes.split(",") if size]
+
+    results = []
+    if args.only != "macro":
+        results.extend(run_micro(sizes, args.emails, args.repeat, args))
+    if args.only != "micro" and args.store != "none":
+        results.extend(asyncio.run(run_macro(macro_sizes, args.repeat, args)))
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "arguments": vars(args),
+        "results": results
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.utcnow():%Y%m%d-%H%M%S}-{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"Saved {len(results)} results to {output}", file=sys.stderr)
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
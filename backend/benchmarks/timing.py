@@ -0,0 +1,25 @@
+"""Wall-clock timing shared by the benchmark scripts and the suite"""
+import gc
+import time
+from typing import Any, Awaitable, Callable
+
+
+def best_of(func: Callable[[], Any], repeat: int) -> float:
+    """Best wall time of `func` over `repeat` runs, collecting garbage before each run"""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+async def best_of_async(func: Callable[[], Awaitable[Any]], repeat: int) -> float:
+    """best_of() for coroutine functions"""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        await func()
+        best = min(best, time.perf_counter() - started)
+    return best
@@ -38,7 +38,15 @@ async def connect_to_mongo():
         
         # Create indexes for better performance
         await db.events.create_index("start")
+        await db.events.create_index([("start", 1), ("_id", 1)])
         await db.events.create_index("agendaOrder")
+        await db.events.create_index(
+            [("recurrence", 1), ("start", 1)],
+            partialFilterExpression={"recurrence": {"$type": "string"}}
+        )
+        await db.events.create_index([("recurringEventId", 1), ("originalStart", 1)])
+        await db.events.create_index("version")
+        await db.event_tombstones.create_index("version")
         await db.emails.create_index("message_id")
         await db.emails.create_index("recipient")
         await db.email_drafts.create_index("user_id")
@@ -46,6 +54,17 @@ async def connect_to_mongo():
         
         logger.info("Database indexes created successfully")
         
+        # Continue the agenda order sequence after any existing events
+        from utils.sequence import AGENDA_ORDER_SEQUENCE, seed_sequence
+        last_event = await db.events.find_one(sort=[("agendaOrder", -1)])
+        await seed_sequence(AGENDA_ORDER_SEQUENCE, last_event.get("agendaOrder") if last_event else 0)
+
+        # Events written before change versions existed still need one for delta sync
+        from utils.change_version import backfill_event_versions
+        stamped = await backfill_event_versions()
+        if stamped:
+            logger.info(f"Stamped change versions on {stamped} existing events")
+        
     except Exception as e:
         logger.error(f"Could not connect to MongoDB: {e}")
         raise e
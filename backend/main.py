@@ -1,19 +1,37 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import Body, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from bson import ObjectId
-from typing import List
-from datetime import datetime, timezone
+from pydantic import ValidationError
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timezone, timedelta
+import asyncio
+import heapq
+import json
 import logging
 import os
+import re
+import pytz
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 from database import db, connect_to_mongo, close_mongo_connection
-from models.schema import EventBase, EventCreate, EventDB, EventUpdate
-from utils.time_utils import to_utc, format_datetime
+from models.schema import EventCreate, EventDB, EventUpdate
+from utils.time_utils import to_utc, parse_stored_datetime
+from utils.serialization import EVENT_PROJECTION, EventJSONResponse, event_ndjson_line, serialize_event_document, serialize_event_documents
+from utils.pagination import encode_cursor, keyset_filter, resume_key
+from utils.recurrence import NON_RECURRING_FILTER, expand_recurring_events, find_occurrence, find_override, parse_occurrence_id, recurrence_expander
+from utils.sequence import AGENDA_ORDER_SEQUENCE, next_sequence, reserve_sequence
+from utils.agenda_cache import agenda_cache
+from utils.interval_index import freebusy_index
+from utils.conflict_check import check_event_conflicts
+from utils.slot_finder import SLOT_MAX_RESULTS, SLOT_RANKINGS, find_available_slots
+from utils.change_feed import CHANGE_FEED_HEARTBEAT_SECONDS, CHANGE_FEED_SOURCE, RESYNC_MESSAGE, change_feed, publish_event_change, run_change_stream_publisher
+from utils.change_version import bump_events_version, current_events_version, etag_matches, make_etag, record_tombstones, reserve_event_versions, version_stamp
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,14 +39,35 @@ logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Calendar Management API", version="1.0.0")
 
+# Page size for keyset-paginated event listings
+DEFAULT_PAGE_SIZE = int(os.getenv("EVENTS_PAGE_SIZE", "500"))
+MAX_PAGE_SIZE = 5000
+
+# Upper bound on items accepted by the bulk event endpoints
+MAX_BULK_SIZE = int(os.getenv("EVENTS_MAX_BULK_SIZE", "5000"))
+
+# Events per MongoDB batch and per flushed chunk for NDJSON exports
+EXPORT_BATCH_SIZE = int(os.getenv("EVENTS_EXPORT_BATCH_SIZE", "1000"))
+
+# Delta sync holds back changes younger than this: versions are reserved before
+# their write lands, so a slower concurrent write may still commit a lower one
+CHANGES_SETTLE_SECONDS = float(os.getenv("EVENTS_CHANGES_SETTLE_SECONDS", "2"))
+
+# Longest window /api/freebusy answers in one call
+FREEBUSY_MAX_DAYS = int(os.getenv("FREEBUSY_MAX_DAYS", "92"))
+
+# How far ahead /api/agenda expands recurring series
+AGENDA_RECURRENCE_DAYS = int(os.getenv("AGENDA_RECURRENCE_DAYS", "30"))
+
 # CORS middleware - Allow frontend origin
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[FRONTEND_URL, "http://localhost:3000"],
     allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Global exception handler
@@ -45,12 +84,52 @@ async def global_exception_handler(request: Request, exc: Exception):
 async def health_check():
     return {"status": "healthy", "message": "Calendar Management API is running"}
 
+@app.get("/api/gemini/status")
+async def gemini_status():
+    return {
+        "circuit_breaker": gemini_breaker.stats(),
+        "rate_limiter": gemini_governor.stats(),
+        "summary_cache": summary_cache.stats()
+    }
+
+@app.get("/api/agenda/cache/status")
+async def agenda_cache_status():
+    return agenda_cache.stats()
+
+@app.get("/api/freebusy/status")
+async def freebusy_status():
+    return freebusy_index.stats()
+
+@app.get("/api/events/feed/status")
+async def change_feed_status():
+    return change_feed.stats()
+
+# Background task that pre-generates prep summaries for upcoming meetings
+prep_prewarm_task: Optional[asyncio.Task] = None
+# Background task feeding the change feed from a MongoDB change stream (CHANGE_FEED_SOURCE=mongo)
+change_stream_task: Optional[asyncio.Task] = None
+
 @app.on_event("startup")
 async def startup_db_client():
+    global prep_prewarm_task, change_stream_task
     await connect_to_mongo()
+    # Open the pooled Gemini client with the app so prep requests reuse its connections
+    get_gemini_client()
+    if PREWARM_ENABLED:
+        prep_prewarm_task = asyncio.create_task(run_prep_prewarm_loop())
+    if CHANGE_FEED_SOURCE == "mongo":
+        change_stream_task = asyncio.create_task(run_change_stream_publisher())
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    for task in (prep_prewarm_task, change_stream_task):
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    await close_gemini_client()
     await close_mongo_connection()
 
 # Using models from schema.py
@@ -63,137 +142,681 @@ def document_to_event(document):
     return None
 
 
-# Async placeholder for meeting prep summary generation
-from typing import Any
-import asyncio
-from utils.gemini_api import generate_gemini_summary
-
-async def generate_meeting_prep(title: str, start: str, description: str, attendees: Any) -> list:
-    prompt = f"""
-You are a smart meeting assistant. Based on the following event information, generate a concise, professional bullet-point summary for meeting preparation. Use simple language suitable for quick review before joining a meeting.
-
-Title: {title}
-Date & Time: {start}
-Description: {description}
-Attendees: {', '.join(attendees) if attendees else 'None'}
-
-Output format:
-- Bullet point summary of main topics
-- Any required pre-reading or actions
-- Key stakeholders or participants to keep in mind (if mentioned)
-- Questions the attendee should be ready to answer or ask (make these specific to the description)
-"""
+# Meeting prep summary generation
+from utils.gemini_api import close_gemini_client, gemini_breaker, gemini_governor, get_gemini_client, stream_gemini_summary
+from utils.meeting_prep import PREWARM_ENABLED, build_prep_prompt, load_meeting_prep, prep_start, run_prep_prewarm_loop, store_summary_points, template_meeting_prep
+from utils.summary_cache import is_stored_summary_fresh, prep_input_hash, summary_cache
+
+def normalize_event_document(document):
+    """Normalize stored start/end values to UTC datetimes for EventDB"""
+    document["start"] = parse_stored_datetime(document["start"])
+    document["end"] = parse_stored_datetime(document["end"])
+    if "_id" in document:
+        document["_id"] = str(document["_id"])
+    return document
+
+def prepare_event_dates(event_dict: dict) -> dict:
+    """Convert every date field present in an event payload to a native UTC datetime"""
+    for field in ("start", "end", "originalStart"):
+        if event_dict.get(field) is not None:
+            event_dict[field] = to_utc(event_dict[field])
+    if event_dict.get("recurrenceExceptions"):
+        event_dict["recurrenceExceptions"] = [to_utc(value) for value in event_dict["recurrenceExceptions"]]
+    return event_dict
+
+def event_sort_key(document: dict):
+    return (document["start"], str(document["_id"]))
+
+def build_events_query(start_from: Optional[datetime], start_to: Optional[datetime], cursor: Optional[str],
+                       exclude_series: bool = False) -> dict:
+    """Build the events filter for a start-time window resumed after a keyset cursor"""
+    clauses = []
+    start_range = {}
+    if start_from:
+        start_range["$gte"] = to_utc(start_from)
+    if start_to:
+        start_range["$lt"] = to_utc(start_to)
+    if start_range:
+        clauses.append({"start": start_range})
+    if exclude_series:
+        # Series masters are returned as expanded occurrences instead
+        clauses.append(NON_RECURRING_FILTER)
     try:
-        summary = await generate_gemini_summary(prompt)
-        if summary:
-            return [line for line in summary.split('\n') if line.strip()]
-    except Exception as e:
-        # Fallback to default points if Gemini API fails
-        pass
-    points = [
-        f"Main topic: {title} (Scheduled for {start})",
-        f"Review meeting description: {description if description else 'No description provided.'}",
-        f"Key participants: {', '.join(attendees) if attendees else 'None'}",
-        "Prepare questions or discussion points relevant to the agenda."
-    ]
-    return points
+        resume = keyset_filter(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if resume:
+        clauses.append(resume)
+    if not clauses:
+        return {}
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def conditional_headers(request: Request, etag: str):
+    """Caching headers for a listing, plus a 304 response if the client already has this version"""
+    # no-cache makes browsers revalidate with If-None-Match on every request
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return headers, Response(status_code=304, headers=headers)
+    return headers, None
 
 # Routes
 @app.get("/api/events", response_model=List[EventDB])
-async def get_events():
-    events = []
-    cursor = db.events.find().sort("start", 1)  # Sort by start time
-    async for document in cursor:
-        start_val = document["start"]
-        end_val = document["end"]
-        if isinstance(start_val, str):
-            document["start"] = format_datetime(to_utc(datetime.fromisoformat(start_val)))
-        else:
-            document["start"] = format_datetime(to_utc(start_val))
-        if isinstance(end_val, str):
-            document["end"] = format_datetime(to_utc(datetime.fromisoformat(end_val)))
+async def get_events(
+    request: Request,
+    start_from: Optional[datetime] = Query(None, alias="from", description="Only events starting at or after this time"),
+    start_to: Optional[datetime] = Query(None, alias="to", description="Only events starting before this time"),
+    cursor: Optional[str] = Query(None, description="Resume after the position returned in X-Next-Cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of events to return"),
+):
+    # Read the version before the query so a concurrent write can only make the ETag older, never newer
+    headers, not_modified = conditional_headers(request, make_etag(await current_events_version(), request.url.query))
+    if not_modified:
+        return not_modified
+
+    # Recurring series can only be expanded lazily inside a bounded window
+    expand_series = start_from is not None and start_to is not None
+    query = build_events_query(start_from, start_to, cursor, exclude_series=expand_series)
+    # Keyset scan on (start, _id); fetch one extra row to know whether another page exists
+    documents = []
+    cursor_docs = db.events.find(query, EVENT_PROJECTION).sort([("start", 1), ("_id", 1)]).limit(limit + 1)
+    async for document in cursor_docs:
+        documents.append(serialize_event_document(document))
+
+    if expand_series:
+        after = resume_key(cursor)
+        occurrences = [
+            serialize_event_document(occurrence)
+            for occurrence in await expand_recurring_events(to_utc(start_from), to_utc(start_to))
+            if after is None or event_sort_key(occurrence) > after
+        ]
+        documents = list(heapq.merge(documents, occurrences, key=event_sort_key))
+
+    if len(documents) > limit:
+        last = documents[limit - 1]
+        headers["X-Next-Cursor"] = encode_cursor(last["start"], last["_id"])
+        documents = documents[:limit]
+    # Documents come from our own writes, so skip re-validating them through EventDB
+    return EventJSONResponse(content=documents, headers=headers)
+
+@app.get("/api/events/stream")
+async def stream_events(
+    start_from: Optional[datetime] = Query(None, alias="from", description="Only events starting at or after this time"),
+    start_to: Optional[datetime] = Query(None, alias="to", description="Only events starting before this time"),
+    cursor: Optional[str] = Query(None, description="Resume after the position returned in X-Next-Cursor"),
+    limit: Optional[int] = Query(None, ge=1, description="Stop after this many events (default: no limit)"),
+    batch_size: int = Query(EXPORT_BATCH_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Events fetched and flushed per batch"),
+):
+    """
+    Export events as newline-delimited JSON, written straight from the
+    MongoDB cursor in batches so memory stays flat regardless of size.
+    """
+    expand_series = start_from is not None and start_to is not None
+    query = build_events_query(start_from, start_to, cursor, exclude_series=expand_series)
+    occurrences = []
+    if expand_series:
+        after = resume_key(cursor)
+        occurrences = [
+            occurrence for occurrence in await expand_recurring_events(to_utc(start_from), to_utc(start_to))
+            if after is None or event_sort_key(occurrence) > after
+        ]
+
+    async def ndjson_lines():
+        mongo_cursor = db.events.find(query, EVENT_PROJECTION).sort([("start", 1), ("_id", 1)]).batch_size(batch_size)
+        if limit:
+            mongo_cursor = mongo_cursor.limit(limit)
+        chunk = []
+        sent = 0
+        next_occurrence = 0
+
+        async def pending():
+            # Interleave window occurrences with the cursor in (start, _id) order
+            nonlocal next_occurrence
+            async for document in mongo_cursor:
+                document["start"] = parse_stored_datetime(document["start"])
+                while next_occurrence < len(occurrences) and event_sort_key(occurrences[next_occurrence]) < event_sort_key(document):
+                    yield occurrences[next_occurrence]
+                    next_occurrence += 1
+                yield document
+            while next_occurrence < len(occurrences):
+                yield occurrences[next_occurrence]
+                next_occurrence += 1
+
+        async for document in pending():
+            if limit and sent >= limit:
+                break
+            chunk.append(event_ndjson_line(document))
+            sent += 1
+            if len(chunk) >= batch_size:
+                yield b"".join(chunk)
+                chunk = []
+        if chunk:
+            yield b"".join(chunk)
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+@app.get("/api/events/changes")
+async def get_event_changes(
+    since: str = Query("0", description="nextToken from the previous call, or 0 for a full sync"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of changes to return"),
+):
+    """
+    Delta sync: inserts, updates and deletes with a version above `since`, in
+    version order. Call again with nextToken while hasMore is true.
+    """
+    try:
+        since_version = int(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    if since_version < 0:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+
+    # Both scans walk the version indexes; limit + 1 rows from each cover the merged page
+    newer = {"version": {"$gt": since_version}}
+    events = await db.events.find(newer, {**EVENT_PROJECTION, "createdVersion": 1}).sort("version", 1).limit(limit + 1).to_list(limit + 1)
+    tombstones = await db.event_tombstones.find(newer).sort("version", 1).limit(limit + 1).to_list(limit + 1)
+
+    settled_before = datetime.now(timezone.utc) - timedelta(seconds=CHANGES_SETTLE_SECONDS)
+    changes = []
+    next_version = since_version
+    has_more = False
+    for document in heapq.merge(events, tombstones, key=lambda document: document["version"]):
+        if len(changes) >= limit or parse_stored_datetime(document["updatedAt"]) > settled_before:
+            has_more = True
+            break
+        if "eventId" in document:
+            changes.append({"type": "delete", "id": document["eventId"], "version": document["version"]})
         else:
-            document["end"] = format_datetime(to_utc(end_val))
-        if "_id" in document:
-            document["_id"] = str(document["_id"])
-        events.append(EventDB(**document))
-    return events
-
-@app.get("/api/agenda")
-async def get_agenda():
+            changes.append({
+                "type": "insert" if (document.get("createdVersion") or 0) > since_version else "update",
+                "id": str(document["_id"]),
+                "version": document["version"],
+                "event": serialize_event_document(document)
+            })
+        next_version = document["version"]
+
+    return EventJSONResponse(content={"changes": changes, "nextToken": str(next_version), "hasMore": has_more})
+
+@app.get("/api/events/feed")
+async def event_feed(
+    request: Request,
+    user: Optional[str] = Query(None, description="Only changes to events this attendee is on"),
+):
+    """
+    Push change feed as Server-Sent Events: "ready" with a sync token, then a
+    "change" event per insert/update/summary/delete. A client that falls too
+    far behind gets "resync" and should catch up through /api/events/changes.
+    """
+    subscription = change_feed.subscribe(user)
+    token = str(await current_events_version())
+
+    async def feed_events():
+        try:
+            yield sse_event("ready", {"token": token})
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), timeout=CHANGE_FEED_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    # Comment line keeps idle connections open through proxies
+                    yield ": keep-alive\n\n"
+                    continue
+                yield message
+                if message is RESYNC_MESSAGE:
+                    return
+        finally:
+            change_feed.unsubscribe(subscription)
+
+    return StreamingResponse(
+        feed_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/freebusy")
+async def get_freebusy(
+    start_from: datetime = Query(..., alias="from", description="Start of the window"),
+    start_to: datetime = Query(..., alias="to", description="End of the window"),
+    user: Optional[str] = Query(None, description="Only events this attendee is on"),
+):
+    window_start, window_end = to_utc(start_from), to_utc(start_to)
+    if window_end <= window_start:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    if window_end - window_start > timedelta(days=FREEBUSY_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"Window can span at most {FREEBUSY_MAX_DAYS} days")
+    busy = await freebusy_index.busy(user, window_start, window_end)
+    return EventJSONResponse(content={
+        "from": window_start,
+        "to": window_end,
+        "busy": [{"start": start, "end": end} for start, end in busy]
+    })
+
+@app.get("/api/slots")
+async def get_available_slots(
+    start_from: datetime = Query(..., alias="from", description="Start of the search window"),
+    start_to: datetime = Query(..., alias="to", description="End of the search window"),
+    duration: int = Query(30, ge=5, le=24 * 60, description="Meeting length in minutes"),
+    attendees: Optional[List[str]] = Query(None, description="Everyone who must be free; the whole calendar if omitted"),
+    working_start: int = Query(9, ge=0, le=23, description="Start of working hours (hour of day)"),
+    working_end: int = Query(17, ge=1, le=24, description="End of working hours (hour of day)"),
+    tz: str = Query("UTC", description="Time zone the working hours are in"),
+    include_weekends: bool = Query(False),
+    limit: int = Query(5, ge=1, le=SLOT_MAX_RESULTS),
+    rank: str = Query("earliest", description="'earliest' or 'best' (one slot per free gap, tightest fit first)"),
+):
+    window_start, window_end = to_utc(start_from), to_utc(start_to)
+    if window_end <= window_start:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    if window_end - window_start > timedelta(days=FREEBUSY_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"Window can span at most {FREEBUSY_MAX_DAYS} days")
+    if working_end <= working_start:
+        raise HTTPException(status_code=400, detail="'working_end' must be after 'working_start'")
+    if rank not in SLOT_RANKINGS:
+        raise HTTPException(status_code=400, detail=f"'rank' must be one of {', '.join(SLOT_RANKINGS)}")
+    if tz not in pytz.all_timezones_set:
+        raise HTTPException(status_code=400, detail="Unknown time zone")
+    slots = await find_available_slots(
+        attendees, timedelta(minutes=duration), window_start, window_end,
+        working_start, working_end, tz, include_weekends, limit, rank
+    )
+    return EventJSONResponse(content={"from": window_start, "to": window_end, "slots": slots})
+
+@app.get("/api/agenda", response_model=List[EventDB])
+async def get_agenda(
+    request: Request,
+    user: Optional[str] = Query(None, description="Only events this attendee is on"),
+):
     # Get today's date at midnight in UTC
     today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    user = user.strip().lower() if user else None
+
+    # The agenda also changes when the day rolls over
+    version = await current_events_version()
+    headers, not_modified = conditional_headers(
+        request, make_etag(version, today.date(), AGENDA_RECURRENCE_DAYS, user)
+    )
+    if not_modified:
+        return not_modified
+
+    cache_key = (user, today.date())
+    body = agenda_cache.get(cache_key, version)
+    if body is not None:
+        return Response(content=body, media_type="application/json", headers=headers)
+    generation = agenda_cache.generation
     
     # Find upcoming events
-    cursor = db.events.find({
-        "start": {"$gte": today}
-    }).sort([("start", 1), ("agendaOrder", 1)])
+    clauses = [{"start": {"$gte": today}}, NON_RECURRING_FILTER]
+    if user:
+        clauses.append({"attendees": {"$regex": f"^{re.escape(user)}$", "$options": "i"}})
+    cursor = db.events.find({"$and": clauses}, EVENT_PROJECTION).sort([("start", 1), ("agendaOrder", 1)])
     
     events = []
     async for document in cursor:
-        start_val = document["start"]
-        end_val = document["end"]
-        if isinstance(start_val, str):
-            document["start"] = format_datetime(to_utc(datetime.fromisoformat(start_val)))
-        else:
-            document["start"] = format_datetime(to_utc(start_val))
-        if isinstance(end_val, str):
-            document["end"] = format_datetime(to_utc(datetime.fromisoformat(end_val)))
-        else:
-            document["end"] = format_datetime(to_utc(end_val))
-        if "_id" in document:
-            document["_id"] = str(document["_id"])
-        events.append(EventDB(**document))
-    return events
+        events.append(serialize_event_document(document))
 
-from datetime import datetime, timezone, timedelta
+    # Recurring series contribute their occurrences within the agenda horizon
+    occurrences = await expand_recurring_events(today, today + timedelta(days=AGENDA_RECURRENCE_DAYS))
+    if user:
+        occurrences = [
+            occurrence for occurrence in occurrences
+            if user in (attendee.lower() for attendee in occurrence.get("attendees") or [])
+        ]
+    if occurrences:
+        events = sorted(events + serialize_event_documents(occurrences), key=lambda event: (event["start"], event.get("agendaOrder") or 0))
+    response = EventJSONResponse(content=events, headers=headers)
+    agenda_cache.put(cache_key, response.body, generation, version)
+    return response
+
+async def event_with_conflicts(document: dict, status_code: int = 200) -> EventJSONResponse:
+    """A written event plus its conflicts with neighboring events, for check_conflicts=true"""
+    conflicts = await check_event_conflicts(document)
+    content = serialize_event_document(document)
+    content["conflicts"] = [conflict.model_dump() for conflict in conflicts]
+    return EventJSONResponse(content=content, status_code=status_code)
 
 @app.post("/api/events", response_model=EventDB, status_code=201)
-async def create_event(event: EventCreate):
-    event_dict = event.dict()
-    # Ensure dates are timezone-aware and converted to UTC
-    event_dict["start"] = format_datetime(to_utc(event_dict["start"]))
-    event_dict["end"] = format_datetime(to_utc(event_dict["end"]))
+async def create_event(
+    event: EventCreate,
+    check_conflicts: bool = Query(False, description="Also return overlap and buffer conflicts with neighboring events"),
+):
+    # Store dates as native UTC datetimes so range queries can use the start index
+    event_dict = prepare_event_dates(event.dict())
     
-    # Add auto-incrementing agenda order
-    last_event = await db.events.find_one(sort=[("agendaOrder", -1)])
-    event_dict["agendaOrder"] = (last_event.get("agendaOrder", 0) + 1) if last_event else 1
+    # Add auto-incrementing agenda order from the atomic counter
+    event_dict["agendaOrder"] = await next_sequence(AGENDA_ORDER_SEQUENCE)
+    version = await reserve_event_versions()
+    event_dict.update(version_stamp(version), createdVersion=version)
     
-    new_event = await db.events.insert_one(event_dict)
-    created_event = await db.events.find_one({"_id": new_event.inserted_id})
-    return EventDB(**created_event)
+    # insert_one sets _id on event_dict, so the stored document needs no re-read
+    await db.events.insert_one(event_dict)
+    agenda_cache.invalidate_events([event_dict])
+    await bump_events_version()
+    freebusy_index.apply_write(written=[event_dict])
+    publish_event_change("insert", event_dict)
+    if check_conflicts:
+        return await event_with_conflicts(event_dict, status_code=201)
+    return EventDB(**normalize_event_document(event_dict))
 
-@app.put("/api/events/{event_id}", response_model=EventDB)
-async def update_event(event_id: str, event: EventUpdate):
-    try:
-        object_id = ObjectId(event_id)
-    except:
+def parse_object_id(value: Any) -> Optional[ObjectId]:
+    """Return the ObjectId for a client supplied id, or None if it is not valid"""
+    if isinstance(value, ObjectId):
+        return value
+    if isinstance(value, str) and ObjectId.is_valid(value):
+        return ObjectId(value)
+    return None
+
+# Series fields an override of one occurrence does not inherit
+OVERRIDE_EXCLUDED_FIELDS = ("_id", "version", "updatedAt", "createdVersion", "summaryHash", "summaryGeneratedAt")
+
+async def resolve_occurrence(event_id: str) -> Tuple[dict, datetime, Optional[dict]]:
+    """
+    The series master, occurrence start and stored override (if any) behind
+    a generated occurrence id such as "<seriesId>_20261102T090000Z".
+    """
+    parsed = parse_occurrence_id(event_id)
+    if parsed is None:
         raise HTTPException(status_code=400, detail="Invalid event ID")
+    series_id, original_start = parsed
+    series = await find_occurrence(series_id, original_start)
+    if not series:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return series, original_start, await find_override(series_id, original_start)
+
+def override_fields(series: dict, original_start: datetime) -> dict:
+    """Fields that make a stored event the override of one occurrence of `series`"""
+    return {
+        "recurrence": None,
+        "recurrenceExceptions": [],
+        "recurringEventId": str(series["_id"]),
+        "originalStart": original_start
+    }
+
+async def find_prep_event(event_id: str) -> dict:
+    """The stored event prep routes work on; a generated occurrence shares its series master's prep"""
+    object_id = parse_object_id(event_id)
+    if object_id is not None:
+        event = await db.events.find_one({"_id": object_id})
+    else:
+        series, _, override = await resolve_occurrence(event_id)
+        event = override or series
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return event
+
+def bulk_summary(results: List[dict]) -> dict:
+    failed = len([r for r in results if r["status"] == "error"])
+    return {
+        "results": results,
+        "succeeded": len(results) - failed,
+        "failed": failed
+    }
+
+def check_bulk_size(items: list):
+    if not items:
+        raise HTTPException(status_code=400, detail="No events provided")
+    if len(items) > MAX_BULK_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_SIZE} events per request")
+
+# Bulk routes are declared before /api/events/{event_id} so "bulk" is not taken as an id
+@app.post("/api/events/bulk")
+async def bulk_create_events(items: List[Dict[str, Any]] = Body(...)):
+    check_bulk_size(items)
+    results = [None] * len(items)
+    documents = []
+    positions = []
+    for index, item in enumerate(items):
+        try:
+            event_dict = prepare_event_dates(EventCreate(**item).dict())
+        except ValidationError as e:
+            results[index] = {"index": index, "status": "error", "detail": str(e)}
+            continue
+        documents.append(event_dict)
+        positions.append(index)
+
+    if documents:
+        # One counter round trip reserves agenda orders for the whole batch
+        first_order = await reserve_sequence(AGENDA_ORDER_SEQUENCE, len(documents))
+        first_version = await reserve_event_versions(len(documents))
+        for offset, event_dict in enumerate(documents):
+            event_dict["agendaOrder"] = first_order + offset
+            event_dict.update(version_stamp(first_version + offset), createdVersion=first_version + offset)
+
+        write_errors = {}
+        try:
+            await db.events.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            write_errors = {err["index"]: err.get("errmsg", "Write failed") for err in e.details.get("writeErrors", [])}
+
+        agenda_cache.invalidate_events(documents)
+        freebusy_index.apply_write(written=[event_dict for offset, event_dict in enumerate(documents) if offset not in write_errors])
+        for offset, event_dict in enumerate(documents):
+            index = positions[offset]
+            if offset in write_errors:
+                results[index] = {"index": index, "status": "error", "detail": write_errors[offset]}
+            else:
+                results[index] = {"index": index, "status": "created", "id": str(event_dict["_id"])}
+                publish_event_change("insert", event_dict)
+        if len(write_errors) < len(documents):
+            await bump_events_version()
+
+    return bulk_summary(results)
+
+# Each item is an EventUpdate payload plus the "id" of the event to update
+@app.patch("/api/events/bulk")
+async def bulk_update_events(items: List[Dict[str, Any]] = Body(...)):
+    check_bulk_size(items)
+    results = [None] * len(items)
+    updates = {}
+    for index, item in enumerate(items):
+        fields = dict(item)
+        object_id = parse_object_id(fields.pop("id", None) or fields.pop("_id", None))
+        if not object_id:
+            results[index] = {"index": index, "status": "error", "detail": "Invalid event ID"}
+            continue
+        try:
+            event_dict = prepare_event_dates(EventUpdate(**fields).dict(exclude_unset=True))
+        except ValidationError as e:
+            results[index] = {"index": index, "status": "error", "id": str(object_id), "detail": str(e)}
+            continue
+        updates[index] = (object_id, event_dict)
+
+    if updates:
+        # A single indexed lookup tells us which ids exist for per-item results
+        existing = {}
+        cursor = db.events.find(
+            {"_id": {"$in": [oid for oid, _ in updates.values()]}},
+            {"start": 1, "end": 1, "attendees": 1, "recurrence": 1, "recurringEventId": 1}
+        )
+        async for document in cursor:
+            existing[document["_id"]] = document
+
+        operations = []
+        operation_positions = []
+        found = [object_id for object_id, _ in updates.values() if object_id in existing]
+        first_version = await reserve_event_versions(len(found)) if found else 0
+        for index, (object_id, event_dict) in updates.items():
+            if object_id not in existing:
+                results[index] = {"index": index, "status": "error", "id": str(object_id), "detail": "Event not found"}
+                continue
+            event_dict.update(version_stamp(first_version + len(operations)))
+            operations.append(UpdateOne({"_id": object_id}, {"$set": event_dict}))
+            operation_positions.append(index)
+            recurrence_expander.invalidate(object_id)
+            results[index] = {"index": index, "status": "updated", "id": str(object_id)}
+
+        if operations:
+            try:
+                await db.events.bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                for err in e.details.get("writeErrors", []):
+                    index = operation_positions[err["index"]]
+                    results[index] = {"index": index, "status": "error", "id": str(updates[index][0]), "detail": err.get("errmsg", "Write failed")}
+            updated = [
+                {**existing[object_id], **event_dict}
+                for index, (object_id, event_dict) in updates.items()
+                if results[index]["status"] == "updated"
+            ]
+            agenda_cache.invalidate_events([existing[object_id] for object_id in found] + updated)
+            await bump_events_version()
+            freebusy_index.apply_write(written=updated)
+
+            if change_feed.subscribers:
+                # Subscribers get whole events, so re-read what was updated (skipped when nobody listens)
+                cursor = db.events.find({"_id": {"$in": found}})
+                async for document in cursor:
+                    publish_event_change("update", document)
+
+    return bulk_summary(results)
+
+@app.delete("/api/events/bulk")
+async def bulk_delete_events(event_ids: List[str] = Body(...)):
+    check_bulk_size(event_ids)
+    results = [None] * len(event_ids)
+    object_ids = {}
+    for index, event_id in enumerate(event_ids):
+        object_id = parse_object_id(event_id)
+        if not object_id:
+            results[index] = {"index": index, "status": "error", "id": event_id, "detail": "Invalid event ID"}
+            continue
+        object_ids[index] = object_id
+
+    if object_ids:
+        existing = {}
+        series_ids = []
+        cursor = db.events.find({"_id": {"$in": list(object_ids.values())}}, {"start": 1, "recurrence": 1, "recurringEventId": 1, "attendees": 1})
+        async for document in cursor:
+            existing[document["_id"]] = document
+            if document.get("recurrence"):
+                series_ids.append(str(document["_id"]))
+
+        deleted = list(existing.values())
+        if series_ids:
+            cursor = db.events.find({"recurringEventId": {"$in": series_ids}}, {"_id": 1, "attendees": 1})
+            deleted.extend([document async for document in cursor])
+
+        await db.events.delete_many({"_id": {"$in": [document["_id"] for document in deleted]}})
+        for series_id in series_ids:
+            recurrence_expander.invalidate(series_id)
+        if existing:
+            tombstones = await record_tombstones(deleted)
+            agenda_cache.invalidate_events(deleted)
+            await bump_events_version()
+            freebusy_index.apply_write(removed=deleted)
+            for tombstone in tombstones:
+                publish_event_change("delete", tombstone)
+
+        for index, object_id in object_ids.items():
+            if object_id in existing:
+                results[index] = {"index": index, "status": "deleted", "id": str(object_id)}
+            else:
+                results[index] = {"index": index, "status": "error", "id": str(object_id), "detail": "Event not found"}
+
+    return bulk_summary(results)
+
+@app.put("/api/events/{event_id}", response_model=EventDB)
+async def update_event(
+    event_id: str,
+    event: EventUpdate,
+    check_conflicts: bool = Query(False, description="Also return overlap and buffer conflicts with neighboring events"),
+):
+    event_dict = prepare_event_dates(event.dict(exclude_unset=True))
+    object_id = parse_object_id(event_id)
+    if object_id is None:
+        # Editing one occurrence of a series stores (or updates) an override for it
+        series, original_start, override = await resolve_occurrence(event_id)
+        event_dict.update(override_fields(series, original_start))
+        if not override:
+            return await create_occurrence_override(series, event_dict, check_conflicts)
+        object_id = override["_id"]
     
-    event_dict = event.dict(exclude_unset=True)
-    updated_event = await db.events.find_one_and_update(
+    event_dict.update(version_stamp(await reserve_event_versions()))
+    # The previous version tells the agenda cache which days the event moved away from
+    previous_event = await db.events.find_one_and_update(
         {"_id": object_id},
         {"$set": event_dict},
-        return_document=True
+        return_document=ReturnDocument.BEFORE
     )
     
-    if not updated_event:
+    if not previous_event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    updated_event = {**previous_event, **event_dict}
+    
+    recurrence_expander.invalidate(object_id)
+    agenda_cache.invalidate_events([previous_event, updated_event])
+    await bump_events_version()
+    freebusy_index.apply_write(written=[updated_event])
+    publish_event_change("update", updated_event)
+    if check_conflicts:
+        return await event_with_conflicts(updated_event)
+    return EventDB(**normalize_event_document(updated_event))
+
+async def create_occurrence_override(series: dict, event_dict: dict, check_conflicts: bool):
+    """Store the first edit of a generated occurrence as an override document"""
+    override = {field: value for field, value in series.items() if field not in OVERRIDE_EXCLUDED_FIELDS}
+    override.update(event_dict)
+    override["agendaOrder"] = await next_sequence(AGENDA_ORDER_SEQUENCE)
+    version = await reserve_event_versions()
+    override.update(version_stamp(version), createdVersion=version)
+    
+    await db.events.insert_one(override)
+    agenda_cache.invalidate_events([series, override])
+    await bump_events_version()
+    freebusy_index.apply_write(written=[override])
+    publish_event_change("insert", override)
+    if check_conflicts:
+        return await event_with_conflicts(override)
+    return EventDB(**normalize_event_document(override))
+
+async def cancel_occurrence(series: dict, original_start: datetime, override: Optional[dict]):
+    """Delete one occurrence of a series by listing its start in recurrenceExceptions"""
+    updated_series = await db.events.find_one_and_update(
+        {"_id": series["_id"]},
+        {"$addToSet": {"recurrenceExceptions": original_start}, "$set": version_stamp(await reserve_event_versions())},
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated_series:
         raise HTTPException(status_code=404, detail="Event not found")
+    deleted = []
+    # An edited occurrence is stored as an override; it goes away with the occurrence
+    if override and await db.events.find_one_and_delete({"_id": override["_id"]}):
+        deleted.append(override)
     
-    return EventDB(**updated_event)
+    recurrence_expander.invalidate(series["_id"])
+    tombstones = await record_tombstones(deleted)
+    agenda_cache.invalidate_events([updated_series] + deleted)
+    await bump_events_version()
+    freebusy_index.apply_write(removed=deleted)
+    publish_event_change("update", updated_series)
+    for tombstone in tombstones:
+        publish_event_change("delete", tombstone)
 
 @app.delete("/api/events/{event_id}")
 async def delete_event(event_id: str):
-    try:
-        object_id = ObjectId(event_id)
-    except:
-        raise HTTPException(status_code=400, detail="Invalid event ID")
+    object_id = parse_object_id(event_id)
+    if object_id is None:
+        await cancel_occurrence(*await resolve_occurrence(event_id))
+        return {"message": "Event deleted"}
     
-    result = await db.events.delete_one({"_id": object_id})
+    deleted_event = await db.events.find_one_and_delete({"_id": object_id})
     
-    if result.deleted_count == 0:
+    if not deleted_event:
         raise HTTPException(status_code=404, detail="Event not found")
     
+    deleted = [deleted_event]
+    if deleted_event.get("recurrence"):
+        # Overrides of single occurrences go away with their series
+        cursor = db.events.find({"recurringEventId": event_id}, {"_id": 1, "attendees": 1})
+        overrides = [document async for document in cursor]
+        await db.events.delete_many({"_id": {"$in": [document["_id"] for document in overrides]}})
+        deleted.extend(overrides)
+        recurrence_expander.invalidate(event_id)
+    tombstones = await record_tombstones(deleted)
+    agenda_cache.invalidate_events(deleted)
+    await bump_events_version()
+    freebusy_index.apply_write(removed=deleted)
+    for tombstone in tombstones:
+        publish_event_change("delete", tombstone)
+    
     return {"message": "Event deleted"}
 
 from routes.email_assistant import router as email_assistant_router
@@ -206,50 +829,88 @@ app.include_router(agents_router, prefix="/api")
 
 @app.get("/api/events/{event_id}/prep")
 async def get_meeting_prep(event_id: str):
-    try:
-        object_id = ObjectId(event_id)
-    except:
-        raise HTTPException(status_code=400, detail="Invalid event ID")
-    event = await db.events.find_one({"_id": object_id})
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
-    summary_points = await generate_meeting_prep(
-        event.get("title", ""),
-        event.get("start", ""),
-        event.get("meetingDescription", ""),
-        event.get("attendees", [])
-    )
-    await db.events.update_one(
-        {"_id": object_id},
-        {"$set": {"summaryPoints": summary_points}}
-    )
+    event = await find_prep_event(event_id)
+    summary_points = await load_meeting_prep(event)
     return {
         "title": event.get("title", ""),
         "meetingDescription": event.get("meetingDescription", ""),
         "summaryPoints": summary_points,
-        "start": event.get("start", ""),
+        "start": prep_start(event),
         "attendees": event.get("attendees", [])
     }
 
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.get("/api/events/{event_id}/prep/stream")
+async def stream_meeting_prep(event_id: str):
+    """
+    Server-Sent Events variant of the prep endpoint: a "meta" event, one
+    "point" event per bullet as Gemini produces it, then "done" with the
+    full list once summaryPoints has been saved.
+    """
+    event = await find_prep_event(event_id)
+
+    title = event.get("title", "")
+    start = prep_start(event)
+    description = event.get("meetingDescription", "")
+    attendees = event.get("attendees", [])
+    input_hash = prep_input_hash(title, start, description, attendees)
+
+    async def prep_events():
+        yield sse_event("meta", {
+            "title": title,
+            "meetingDescription": description,
+            "start": start,
+            "attendees": attendees
+        })
+
+        cached_points = event["summaryPoints"] if is_stored_summary_fresh(event, input_hash) else summary_cache.get(input_hash)
+        if cached_points is not None:
+            for point in cached_points:
+                yield sse_event("point", {"point": point})
+            yield sse_event("done", {"summaryPoints": cached_points, "cached": True})
+            return
+
+        summary_points = []
+        from_model = False
+        buffer = ""
+        try:
+            async for chunk in stream_gemini_summary(build_prep_prompt(title, start, description, attendees)):
+                buffer += chunk
+                # Forward every completed line; keep the trailing partial line for the next chunk
+                *lines, buffer = buffer.split("\n")
+                for line in lines:
+                    if line.strip():
+                        summary_points.append(line)
+                        yield sse_event("point", {"point": line})
+            if buffer.strip():
+                summary_points.append(buffer)
+                yield sse_event("point", {"point": buffer})
+            from_model = bool(summary_points)
+        except Exception as e:
+            logger.warning(f"Streaming prep for event {event_id} failed: {repr(e)}")
+
+        if not summary_points:
+            summary_points = template_meeting_prep(title, start, description, attendees)
+            for point in summary_points:
+                yield sse_event("point", {"point": point})
+
+        if from_model:
+            summary_cache.put(input_hash, summary_points)
+        await store_summary_points(event, summary_points, input_hash if from_model else None)
+        yield sse_event("done", {"summaryPoints": summary_points, "cached": False})
+
+    return StreamingResponse(
+        prep_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/api/events/{event_id}/regenerate-summary")
 async def regenerate_summary(event_id: str):
-    try:
-        object_id = ObjectId(event_id)
-    except:
-        raise HTTPException(status_code=400, detail="Invalid event ID")
-    event = await db.events.find_one({"_id": object_id})
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
-    summary_points = await generate_meeting_prep(
-        event.get("title", ""),
-        event.get("start", ""),
-        event.get("meetingDescription", ""),
-        event.get("attendees", [])
-    )
-    await db.events.update_one(
-        {"_id": object_id},
-        {"$set": {"summaryPoints": summary_points}}
-    )
+    event = await find_prep_event(event_id)
+    summary_points = await load_meeting_prep(event, force=True)
     return {
         "summaryPoints": summary_points,
         "message": "Summary regenerated successfully"
@@ -257,19 +918,19 @@ async def regenerate_summary(event_id: str):
 
 @app.put("/api/events/{event_id}/summary")
 async def update_summary_points(event_id: str, summary_points: List[str]):
-    try:
-        object_id = ObjectId(event_id)
-    except:
-        raise HTTPException(status_code=400, detail="Invalid event ID")
+    event = await find_prep_event(event_id)
     
     updated_event = await db.events.find_one_and_update(
-        {"_id": object_id},
-        {"$set": {"summaryPoints": summary_points}},
+        {"_id": event["_id"]},
+        {"$set": {"summaryPoints": summary_points, **version_stamp(await reserve_event_versions())}},
         return_document=True
     )
     
     if not updated_event:
         raise HTTPException(status_code=404, detail="Event not found")
+    agenda_cache.invalidate_events([updated_event])
+    await bump_events_version()
+    publish_event_change("summary", updated_event)
     
     return {"message": "Summary points updated"}
 
@@ -0,0 +1,90 @@
+"""
+One-shot migration that rewrites legacy ISO-string start/end values in
+db.events as native BSON dates.
+
+The scan walks documents that still hold a string in either field in _id
+order and writes each batch with a single unordered bulk_write. Converted
+documents no longer match the filter, so an interrupted run can simply be
+started again; --after resumes from a known _id.
+
+Usage:
+    python migrate_event_dates.py [--batch-size 1000] [--after <object id>] [--dry-run]
+"""
+import argparse
+import asyncio
+import logging
+from typing import Optional
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from database import db, close_mongo_connection
+from utils.time_utils import parse_stored_datetime
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("migrate_event_dates")
+
+LEGACY_FILTER = {
+    "$or": [
+        {"start": {"$type": "string"}},
+        {"end": {"$type": "string"}},
+    ]
+}
+
+async def migrate_event_dates(batch_size: int = 1000, after: Optional[ObjectId] = None, dry_run: bool = False) -> dict:
+    """Convert string start/end values to UTC datetimes in batches"""
+    stats = {"scanned": 0, "modified": 0, "failed": 0, "last_id": str(after) if after else None}
+    last_id = after
+
+    while True:
+        query = LEGACY_FILTER
+        if last_id:
+            query = {"$and": [LEGACY_FILTER, {"_id": {"$gt": last_id}}]}
+        cursor = db.events.find(query, {"start": 1, "end": 1}).sort("_id", 1).limit(batch_size)
+
+        operations = []
+        batch_count = 0
+        async for document in cursor:
+            last_id = document["_id"]
+            batch_count += 1
+            try:
+                update = {
+                    "start": parse_stored_datetime(document["start"]),
+                    "end": parse_stored_datetime(document["end"]),
+                }
+            except (KeyError, TypeError, ValueError) as e:
+                stats["failed"] += 1
+                logger.warning(f"Skipping event {document['_id']}: {e}")
+                continue
+            operations.append(UpdateOne({"_id": document["_id"]}, {"$set": update}))
+
+        if batch_count == 0:
+            break
+        stats["scanned"] += batch_count
+        stats["last_id"] = str(last_id)
+
+        if operations and not dry_run:
+            result = await db.events.bulk_write(operations, ordered=False)
+            stats["modified"] += result.modified_count
+        logger.info(f"Processed batch ending at {stats['last_id']}: {stats}")
+
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Rewrite legacy string event dates as native BSON dates")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Documents per bulk_write batch")
+    parser.add_argument("--after", type=str, default=None, help="Resume after this event _id")
+    parser.add_argument("--dry-run", action="store_true", help="Scan and convert without writing")
+    args = parser.parse_args()
+
+    async def run():
+        try:
+            after = ObjectId(args.after) if args.after else None
+            stats = await migrate_event_dates(args.batch_size, after, args.dry_run)
+            logger.info(f"Migration finished: {stats}")
+        finally:
+            await close_mongo_connection()
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
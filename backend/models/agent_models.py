@@ -91,6 +91,7 @@ class ScheduleOptimization(BaseModel):
     optimized_schedule: List[Dict[str, Any]]
     improvements: List[str]
     efficiency_score: float
+    run_time_ms: Optional[float] = None
     created_at: datetime
     applied: bool = False
     
@@ -31,6 +31,9 @@ class EventBase(BaseModel):
     attendees: List[str] = []
     reminders: List[int] = []
     recurrence: Optional[str] = None
+    recurrenceExceptions: List[datetime] = []  # cancelled occurrence starts of a series
+    recurringEventId: Optional[str] = None  # set on an override of one occurrence
+    originalStart: Optional[datetime] = None  # occurrence start replaced by an override
     summaryPoints: List[str] = []
     status: str = "upcoming"
     cardColor: Optional[str] = None
@@ -43,6 +46,8 @@ class EventBase(BaseModel):
 
 class EventDB(EventBase):
     id: str = Field(alias="_id")
+    version: Optional[int] = None  # change version stamped on every write, see /api/events/changes
+    updatedAt: Optional[datetime] = None
 
 class EventCreate(EventBase):
     pass
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta, timezone
+
+from utils.conflict_detector import ConflictDetector
+
+DAY = datetime(2026, 3, 2)
+
+def event(event_id, start_hour, end_hour):
+    """An event on DAY with start/end given as fractional hours, as naive UTC datetimes"""
+    return {
+        "id": event_id,
+        "start": DAY + timedelta(hours=start_hour),
+        "end": DAY + timedelta(hours=end_hour)
+    }
+
+def overlaps(events):
+    return [conflict for conflict in ConflictDetector().detect_conflicts(events, "user") if conflict.conflict_type == "time_overlap"]
+
+
+def test_long_meeting_covering_later_meetings_is_one_cluster():
+    events = [event("long", 9, 13), event("b", 9.5, 10), event("c", 10.5, 11), event("d", 11.5, 12)]
+    conflicts = overlaps(events)
+    assert len(conflicts) == 1
+    assert conflicts[0].affected_events == ["long", "b", "c", "d"]
+    assert conflicts[0].conflict_id == "overlap_long_d"
+    assert conflicts[0].suggested_resolution["cluster_start"] == DAY + timedelta(hours=9)
+    assert conflicts[0].suggested_resolution["cluster_end"] == DAY + timedelta(hours=13)
+
+def test_chained_overlaps_form_one_cluster():
+    # a and c do not overlap each other, only through b
+    events = [event("c", 10.25, 11), event("a", 9, 10), event("b", 9.5, 10.5)]
+    conflicts = overlaps(events)
+    assert len(conflicts) == 1
+    assert conflicts[0].affected_events == ["a", "b", "c"]
+    assert conflicts[0].suggested_resolution["options"][-1]["action"] == "move_later_events"
+
+def test_back_to_back_meetings_do_not_overlap():
+    events = [event("a", 9, 10), event("b", 10, 11), event("c", 11, 11.5)]
+    assert overlaps(events) == []
+
+def test_separate_groups_are_reported_separately():
+    events = [event("a", 9, 10), event("b", 9.5, 10.5), event("c", 14, 15), event("d", 14.5, 15.5)]
+    assert [conflict.affected_events for conflict in overlaps(events)] == [["a", "b"], ["c", "d"]]
+
+def test_iso_z_and_offset_strings():
+    z_strings = [
+        {"id": "a", "start": "2026-03-02T09:00:00Z", "end": "2026-03-02T10:00:00Z"},
+        {"id": "b", "start": "2026-03-02T09:30:00Z", "end": "2026-03-02T10:30:00Z"}
+    ]
+    # 10:00+01:00 is 09:00Z, so the same two meetings
+    offset_strings = [
+        {"id": "a", "start": "2026-03-02T10:00:00+01:00", "end": "2026-03-02T11:00:00+01:00"},
+        {"id": "b", "start": "2026-03-02T09:30:00+00:00", "end": "2026-03-02T10:30:00+00:00"}
+    ]
+    for events in (z_strings, offset_strings):
+        conflicts = overlaps(events)
+        assert [conflict.affected_events for conflict in conflicts] == [["a", "b"]]
+        assert conflicts[0].suggested_resolution["cluster_start"] == DAY + timedelta(hours=9)
+        assert conflicts[0].suggested_resolution["cluster_end"] == DAY + timedelta(hours=10.5)
+
+def test_offset_strings_not_overlapping_in_utc():
+    # 09:30-05:00 is 14:30Z, well after the first meeting ends
+    events = [
+        {"id": "a", "start": "2026-03-02T09:00:00Z", "end": "2026-03-02T10:00:00Z"},
+        {"id": "b", "start": "2026-03-02T09:30:00-05:00", "end": "2026-03-02T10:30:00-05:00"}
+    ]
+    assert overlaps(events) == []
+
+def test_two_event_group_matches_baseline():
+    # The conflict id and options the adjacent-pair scan produced for a pair
+    conflicts = overlaps([event("a", 9, 10), event("b", 9.5, 10.5)])
+    assert len(conflicts) == 1
+    assert conflicts[0].conflict_id == "overlap_a_b"
+    assert conflicts[0].affected_events == ["a", "b"]
+    assert conflicts[0].severity == "high"
+    assert conflicts[0].suggested_resolution["type"] == "reschedule"
+    assert conflicts[0].suggested_resolution["options"] == [
+        {"action": "move_second_event", "new_start": DAY + timedelta(hours=10, minutes=15),
+         "reason": "Move second event to avoid overlap"},
+        {"action": "shorten_first_event", "new_end": DAY + timedelta(hours=9, minutes=15),
+         "reason": "Shorten first event to avoid overlap"}
+    ]
+
+def test_two_event_group_options_keep_string_offsets():
+    conflicts = overlaps([
+        {"id": "a", "start": "2026-03-02T10:00:00+01:00", "end": "2026-03-02T11:00:00+01:00"},
+        {"id": "b", "start": "2026-03-02T09:30:00Z", "end": "2026-03-02T10:30:00Z"}
+    ])
+    options = conflicts[0].suggested_resolution["options"]
+    plus_one = timezone(timedelta(hours=1))
+    assert options[0]["new_start"] == datetime(2026, 3, 2, 11, 15, tzinfo=plus_one)
+    assert options[0]["new_start"].utcoffset() == timedelta(hours=1)
+    assert options[1]["new_end"] == datetime(2026, 3, 2, 9, 15, tzinfo=timezone.utc)
+    assert options[1]["new_end"].utcoffset() == timedelta(0)
@@ -0,0 +1,85 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from utils.conflict_detector import ConflictDetector
+
+pytest.importorskip("numpy")
+
+EASTERN = timezone(timedelta(hours=-5))
+TIME_FORMATS = ["datetime", "z", "utc_offset", "aware_utc", "minus_five", "aware_minus_five", "utc_strings", "mixed"]
+# Calendars that mix formats mix strings, since naive and aware datetimes cannot be compared
+MIXED_FORMATS = {"utc_strings": ["z", "utc_offset"], "mixed": ["z", "utc_offset", "minus_five"]}
+
+def make_dense_calendar(count, seed, time_format):
+    """A few busy days with ties, zero-length meetings, back-to-back runs and short gaps"""
+    rng = random.Random(seed)
+    days = rng.randint(1, 4)
+    events = []
+    for index in range(count):
+        # Wall-clock times reach 23:45, so -05:00 meetings cross the UTC date line
+        start = datetime(2026, 3, 1 + rng.randrange(days), rng.randint(6, 23), rng.choice([0, 5, 10, 15, 20, 30, 45]))
+        end = start + timedelta(minutes=rng.choice([0, 5, 15, 25, 30, 45, 60, 90, 180]))
+        event_format = rng.choice(MIXED_FORMATS[time_format]) if time_format in MIXED_FORMATS else time_format
+        if event_format == "z":
+            start, end = start.isoformat() + "Z", end.isoformat() + "Z"
+        elif event_format == "utc_offset":
+            start, end = start.isoformat() + "+00:00", end.isoformat() + "+00:00"
+        elif event_format == "aware_utc":
+            start, end = start.replace(tzinfo=timezone.utc), end.replace(tzinfo=timezone.utc)
+        elif event_format == "minus_five":
+            start, end = start.isoformat() + "-05:00", end.isoformat() + "-05:00"
+        elif event_format == "aware_minus_five":
+            start, end = start.replace(tzinfo=EASTERN), end.replace(tzinfo=EASTERN)
+        events.append({"id": f"evt{seed}_{index}", "start": start, "end": end})
+    return events
+
+def comparable(conflicts):
+    """Conflicts without the detection timestamp, which differs between runs"""
+    return [conflict.model_dump(exclude={"detected_at"}) for conflict in conflicts]
+
+def engines_agree(events):
+    expected = ConflictDetector(engine="python").detect_conflicts(events, "parity")
+    actual = ConflictDetector(engine="numpy").detect_conflicts(events, "parity")
+    assert comparable(actual) == comparable(expected)
+    return expected
+
+
+@pytest.mark.parametrize("time_format", TIME_FORMATS)
+def test_engines_match_on_dense_calendars(time_format):
+    conflict_types = set()
+    for seed in range(60):
+        events = make_dense_calendar(random.Random(seed).randint(0, 120), seed, time_format)
+        conflict_types.update(conflict.conflict_type for conflict in engines_agree(events))
+    # The calendars are dense enough to exercise every rule
+    assert conflict_types == {"time_overlap", "overbooked", "burnout_risk", "insufficient_buffer"}
+
+def test_z_and_offset_strings_for_the_same_instant():
+    # Both start at 10:00 UTC; the text of "+00:00" sorts before "Z"
+    events = [
+        {"id": "a", "start": "2026-03-02T10:00:00Z", "end": "2026-03-02T11:00:00Z"},
+        {"id": "b", "start": "2026-03-02T10:00:00+00:00", "end": "2026-03-02T10:55:00+00:00"},
+        {"id": "c", "start": "2026-03-02T11:05:00Z", "end": "2026-03-02T11:30:00Z"}
+    ]
+    conflicts = engines_agree(events)
+    assert [(conflict.conflict_type, conflict.affected_events) for conflict in conflicts] == [
+        ("time_overlap", ["a", "b"]),
+        ("insufficient_buffer", ["b", "c"])
+    ]
+
+def test_days_follow_local_dates():
+    # Every meeting is on 2 November at -05:00 but runs into 3 November in UTC
+    start = datetime(2026, 11, 2, 18, 0, tzinfo=EASTERN)
+    events = [
+        {"id": f"evt{index}", "start": start + timedelta(minutes=40 * index),
+         "end": start + timedelta(minutes=40 * index + 35)}
+        for index in range(10)
+    ]
+    conflicts = engines_agree(events)
+    assert {conflict.conflict_id for conflict in conflicts if conflict.conflict_type != "insufficient_buffer"} == {
+        "overbook_2026-11-02_parity", "burnout_2026-11-02_parity"
+    }
+
+def test_empty_schedule():
+    assert ConflictDetector(engine="numpy").detect_conflicts([], "parity") == []
@@ -0,0 +1,23 @@
+from datetime import datetime, timedelta, timezone
+
+from utils.slot_finder import find_slots
+
+DAY = datetime(2026, 3, 2, tzinfo=timezone.utc)
+
+def at(hour):
+    """Epoch seconds for a fractional hour on DAY"""
+    return (DAY + timedelta(hours=hour)).timestamp()
+
+
+def test_best_rank_spare_time_starts_at_the_grid_aligned_slot():
+    # The 09:05-10:00 gap only fits a slot from 09:15, leaving 15 free minutes, not 25
+    slots = find_slots([(at(9), at(9 + 5 / 60))], [(at(9), at(10))], timedelta(minutes=30), timedelta(0), rank="best")
+    assert slots == [{"start": DAY + timedelta(hours=9.25), "end": DAY + timedelta(hours=9.75), "spareMinutes": 15.0}]
+
+def test_best_rank_prefers_the_gap_left_tightest_after_alignment():
+    # 09:05-10:00 looks longer than 10:30-11:15, but once aligned it leaves the same 15 minutes
+    # as the second gap; ties go to the earlier slot
+    busy = [(at(9), at(9 + 5 / 60)), (at(10), at(10.5)), (at(11.25), at(12))]
+    slots = find_slots(busy, [(at(9), at(12))], timedelta(minutes=30), timedelta(0), limit=2, rank="best")
+    assert [slot["start"] for slot in slots] == [DAY + timedelta(hours=9.25), DAY + timedelta(hours=10.5)]
+    assert [slot["spareMinutes"] for slot in slots] == [15.0, 15.0]
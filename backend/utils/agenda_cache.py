@@ -0,0 +1,151 @@
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from utils.time_utils import parse_stored_datetime
+
+AGENDA_CACHE_SIZE = int(os.getenv("AGENDA_CACHE_SIZE", "256"))
+# Ages out entries nobody asks for; freshness comes from the events version check
+AGENDA_CACHE_TTL_SECONDS = float(os.getenv("AGENDA_CACHE_TTL_SECONDS", "60"))
+
+# (user or None for the unfiltered agenda, UTC day the agenda starts on)
+AgendaKey = Tuple[Optional[str], date]
+
+
+class InvalidationBackend(ABC):
+    """
+    Carries agenda invalidations between workers. publish() must deliver the
+    message to every subscriber, including the publishing worker's own cache.
+    A shared implementation (e.g. Redis pub/sub) can replace LocalPubSub.
+    """
+
+    @abstractmethod
+    def publish(self, message: Dict[str, Any]):
+        """Deliver `message` to every subscriber"""
+        pass
+
+    @abstractmethod
+    def subscribe(self, callback: Callable[[Dict[str, Any]], None]):
+        """Call `callback` with every published message"""
+        pass
+
+
+class LocalPubSub(InvalidationBackend):
+    """In-process stand-in that delivers synchronously to subscribers of this worker"""
+
+    def __init__(self):
+        self._subscribers: List[Callable[[Dict[str, Any]], None]] = []
+
+    def publish(self, message: Dict[str, Any]):
+        for callback in self._subscribers:
+            callback(message)
+
+    def subscribe(self, callback: Callable[[Dict[str, Any]], None]):
+        self._subscribers.append(callback)
+
+
+class AgendaCache:
+    """
+    Size-bounded LRU of rendered /api/agenda bodies keyed by (user, day).
+
+    An agenda for day D lists events starting on or after D, so a write to an
+    event starting at S only drops entries for days up to S, and only for the
+    unfiltered agenda and that event's attendees. Recurring series and their
+    overrides can land on any day, so they drop every day for those users.
+    Each body is stored with the events version it was rendered at and only
+    served for that version, which covers writes from other workers too.
+    """
+
+    def __init__(self, backend: Optional[InvalidationBackend] = None,
+                 max_entries: int = AGENDA_CACHE_SIZE, ttl_seconds: float = AGENDA_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (expiry, events version the body was rendered at, body)
+        self._entries: "OrderedDict[AgendaKey, Tuple[float, int, bytes]]" = OrderedDict()
+        # Bumped by every invalidation so a fill computed before a write is not stored after it
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self.backend = backend or LocalPubSub()
+        self.backend.subscribe(self._apply)
+
+    def get(self, key: AgendaKey, version: int) -> Optional[bytes]:
+        """
+        The agenda rendered at events `version`, or None. Bodies from another
+        version are never served, so a write this worker has not heard about
+        (another worker's, or one whose invalidation has not run yet) cannot
+        be returned under the ETag of the new version.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic() or entry[1] != version:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    def put(self, key: AgendaKey, body: bytes, generation: int, version: int):
+        """Store an agenda rendered at events `version` unless an invalidation happened since `generation` was read"""
+        if generation != self.generation:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, version, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate_events(self, documents: Iterable[Dict[str, Any]]):
+        """Drop the agendas that can contain any of these (old or new) event documents"""
+        documents = list(documents)
+        if not documents:
+            return
+        users = set()
+        last_day: Optional[date] = None
+        every_day = False
+        for document in documents:
+            users.update(attendee.strip().lower() for attendee in document.get("attendees") or [] if attendee)
+            if document.get("recurrence") or document.get("recurringEventId"):
+                every_day = True
+            elif document.get("start") is not None:
+                day = parse_stored_datetime(document["start"]).date()
+                last_day = day if last_day is None else max(last_day, day)
+            else:
+                every_day = True
+        self.backend.publish({
+            "users": sorted(users),
+            "last_day": None if every_day or last_day is None else last_day.isoformat()
+        })
+
+    def clear(self):
+        self.backend.publish({"all": True})
+
+    def _apply(self, message: Dict[str, Any]):
+        self.generation += 1
+        if message.get("all"):
+            self.invalidated += len(self._entries)
+            self._entries.clear()
+            return
+        users = set(message.get("users") or [])
+        last_day = date.fromisoformat(message["last_day"]) if message.get("last_day") else None
+        stale = [
+            key for key in self._entries
+            if (key[0] is None or key[0] in users) and (last_day is None or key[1] <= last_day)
+        ]
+        for key in stale:
+            del self._entries[key]
+        self.invalidated += len(stale)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidated": self.invalidated
+        }
+
+
+agenda_cache = AgendaCache()
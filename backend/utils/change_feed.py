@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Iterable, Optional, Set
+import orjson
+from database import db
+from utils.serialization import ORJSON_OPTIONS, serialize_event_document
+
+logger = logging.getLogger(__name__)
+
+# "local" publishes from the API write handlers of this process; "mongo" publishes
+# from a MongoDB change stream (needs a replica set) so every worker sees every write
+CHANGE_FEED_SOURCE = os.getenv("CHANGE_FEED_SOURCE", "local").lower()
+# Messages buffered per subscriber before it is told to resync instead
+CHANGE_FEED_QUEUE_SIZE = int(os.getenv("CHANGE_FEED_QUEUE_SIZE", "256"))
+CHANGE_FEED_HEARTBEAT_SECONDS = float(os.getenv("CHANGE_FEED_HEARTBEAT_SECONDS", "15"))
+
+# Event fields whose change alone makes an update a "summary" change
+SUMMARY_FIELDS = {"summaryPoints", "summaryHash", "summaryGeneratedAt", "version", "updatedAt"}
+
+def sse_message(event: str, data: Any, event_id: Optional[Any] = None) -> str:
+    lines = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{lines}event: {event}\ndata: {orjson.dumps(data, option=ORJSON_OPTIONS).decode()}\n\n"
+
+RESYNC_MESSAGE = sse_message("resync", {"reason": "Subscriber fell behind; catch up with /api/events/changes"})
+
+
+class Subscription:
+    __slots__ = ("user", "queue", "overflowed")
+
+    def __init__(self, user: Optional[str], queue_size: int):
+        self.user = user
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+
+class ChangeFeed:
+    """
+    In-process fan-out of event changes to SSE subscribers.
+
+    Subscribers are indexed by the attendee they follow (None follows every
+    event), so a publish only touches the subscribers it is addressed to. Each
+    message is formatted once and the same string is queued for all of them.
+    A subscriber whose queue fills up is sent a single resync message instead
+    of blocking the publisher.
+    """
+
+    def __init__(self, queue_size: int = CHANGE_FEED_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._by_user: Dict[Optional[str], Set[Subscription]] = {}
+        self.subscribers = 0
+        self.published = 0
+        self.delivered = 0
+        self.resyncs = 0
+
+    def subscribe(self, user: Optional[str] = None) -> Subscription:
+        subscription = Subscription(user.strip().lower() if user else None, self.queue_size)
+        self._by_user.setdefault(subscription.user, set()).add(subscription)
+        self.subscribers += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._by_user.get(subscription.user)
+        if subscriptions and subscription in subscriptions:
+            subscriptions.discard(subscription)
+            self.subscribers -= 1
+            if not subscriptions:
+                del self._by_user[subscription.user]
+
+    def publish(self, message: str, users: Iterable[str] = ()):
+        """Queue a formatted message for subscribers of every event plus those following `users`"""
+        self.published += 1
+        self._deliver(self._by_user.get(None, ()), message)
+        for user in {user.strip().lower() for user in users if user}:
+            self._deliver(self._by_user.get(user, ()), message)
+
+    def _deliver(self, subscriptions: Iterable[Subscription], message: str):
+        for subscription in subscriptions:
+            if subscription.overflowed:
+                continue
+            try:
+                subscription.queue.put_nowait(message)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                # Everything queued is now moot: the client has to resync anyway
+                subscription.overflowed = True
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.queue.put_nowait(RESYNC_MESSAGE)
+                self.resyncs += 1
+
+    def stats(self) -> dict:
+        return {
+            "source": CHANGE_FEED_SOURCE,
+            "subscribers": self.subscribers,
+            "published": self.published,
+            "delivered": self.delivered,
+            "resyncs": self.resyncs
+        }
+
+
+change_feed = ChangeFeed()
+
+def publish_event_change(change_type: str, document: Dict[str, Any], from_change_stream: bool = False):
+    """
+    Publish one insert/update/summary/delete to feed subscribers. `document` is
+    the stored event, or a tombstone for deletes. With CHANGE_FEED_SOURCE=mongo
+    only change-stream notifications are published, so writes are not sent twice.
+    """
+    if (CHANGE_FEED_SOURCE == "mongo") != from_change_stream or not change_feed.subscribers:
+        return
+    event_id = str(document.get("eventId") or document["_id"])
+    data = {"type": change_type, "id": event_id, "version": document.get("version")}
+    if change_type == "summary":
+        data["summaryPoints"] = document.get("summaryPoints") or []
+    elif change_type != "delete":
+        data["event"] = serialize_event_document(document)
+    change_feed.publish(sse_message("change", data, document.get("version")), document.get("attendees") or [])
+
+async def run_change_stream_publisher():
+    """Publish event changes from a MongoDB change stream until cancelled, resuming after errors"""
+    pipeline = [{"$match": {
+        "ns.coll": {"$in": ["events", "event_tombstones"]},
+        "operationType": {"$in": ["insert", "update", "replace"]}
+    }}]
+    resume_token = None
+    while True:
+        try:
+            async with db.watch(pipeline, full_document="updateLookup", resume_after=resume_token) as stream:
+                async for change in stream:
+                    resume_token = stream.resume_token
+                    document = change.get("fullDocument")
+                    if not document:
+                        # Deleted before the lookup ran; its tombstone follows
+                        continue
+                    if change["ns"]["coll"] == "event_tombstones":
+                        change_type = "delete"
+                    elif change["operationType"] == "insert":
+                        change_type = "insert"
+                    else:
+                        updated_fields = {
+                            field.split(".", 1)[0]
+                            for field in (change.get("updateDescription") or {}).get("updatedFields") or {}
+                        }
+                        change_type = "summary" if updated_fields and updated_fields <= SUMMARY_FIELDS else "update"
+                    publish_event_change(change_type, document, from_change_stream=True)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Change stream publisher failed, retrying: {repr(e)}")
+            await asyncio.sleep(5)
@@ -0,0 +1,87 @@
+import hashlib
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from pymongo import UpdateOne
+from database import db
+from utils.sequence import reserve_sequence
+
+EVENTS_VERSION_SEQUENCE = "eventsVersion"
+
+async def reserve_event_versions(count: int = 1) -> int:
+    """Reserve `count` consecutive event versions for upcoming writes and return the first"""
+    return await reserve_sequence(EVENTS_VERSION_SEQUENCE, count)
+
+def version_stamp(version: int) -> Dict[str, Any]:
+    """Fields stamped on every written event so delta sync can find it"""
+    return {"version": version, "updatedAt": datetime.now(timezone.utc)}
+
+async def bump_events_version() -> int:
+    """Advance the events change version; call after every successful write to db.events"""
+    # Versions stamped on documents are reserved before their write lands, so
+    # listings also need this post-write bump to invalidate their ETags
+    return await reserve_sequence(EVENTS_VERSION_SEQUENCE)
+
+async def current_events_version() -> int:
+    """The current events change version (0 before the first write)"""
+    counter = await db.counters.find_one({"_id": EVENTS_VERSION_SEQUENCE})
+    return counter["value"] if counter else 0
+
+async def record_tombstones(deleted_events: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keep a versioned marker for each deleted event so delta sync can report the delete"""
+    deleted_events = list(deleted_events)
+    if not deleted_events:
+        return []
+    first_version = await reserve_event_versions(len(deleted_events))
+    deleted_at = datetime.now(timezone.utc)
+    tombstones = [
+        {
+            "eventId": str(event["_id"]),
+            "version": first_version + offset,
+            "updatedAt": deleted_at,
+            # Kept so per-attendee change feed subscribers still see the delete
+            "attendees": event.get("attendees") or []
+        }
+        for offset, event in enumerate(deleted_events)
+    ]
+    await db.event_tombstones.insert_many(tombstones)
+    return tombstones
+
+async def backfill_event_versions(batch_size: int = 1000) -> int:
+    """Stamp events stored before versioning existed so a full sync (since=0) returns them"""
+    stamped = 0
+    while True:
+        cursor = db.events.find({"version": {"$exists": False}}, {"_id": 1}).limit(batch_size)
+        event_ids = [document["_id"] async for document in cursor]
+        if not event_ids:
+            return stamped
+        first_version = await reserve_event_versions(len(event_ids))
+        await db.events.bulk_write([
+            UpdateOne(
+                {"_id": event_id, "version": {"$exists": False}},
+                {"$set": {**version_stamp(first_version + offset), "createdVersion": first_version + offset}}
+            )
+            for offset, event_id in enumerate(event_ids)
+        ], ordered=False)
+        stamped += len(event_ids)
+
+def make_etag(version: int, *scope: Any) -> str:
+    """Strong ETag for a representation of the events collection at `version`.
+
+    `scope` holds whatever else the response depends on (query string, day, ...).
+    """
+    digest = hashlib.sha1("|".join(str(part) for part in scope).encode("utf-8")).hexdigest()[:16]
+    return f'"v{version}-{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches `etag` (weak comparison, as RFC 9110 requires)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
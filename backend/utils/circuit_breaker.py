@@ -0,0 +1,98 @@
+import time
+from typing import Optional
+
+class CircuitOpenError(Exception):
+    """Raised when a call is short-circuited because the breaker is open"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed    - calls pass through; `failure_threshold` consecutive failures open it
+    open      - calls are rejected until `recovery_timeout` seconds have passed
+    half_open - up to `half_open_max_calls` probe calls pass; a success closes
+                the breaker and a failure opens it again
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0, half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._half_open_calls = 0
+        self.total_failures = 0
+        self.total_successes = 0
+        self.short_circuited = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._half_open_calls = 0
+        return self._state
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+            self._half_open_calls += 1
+            return True
+        self.short_circuited += 1
+        return False
+
+    def check(self):
+        """Raise CircuitOpenError unless a call may proceed"""
+        if not self.allow_request():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def release(self):
+        """Give back a half-open probe slot for a call that ended without a verdict (e.g. cancelled)"""
+        if self._state == self.HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
+
+    def record_success(self):
+        self.total_successes += 1
+        self._consecutive_failures = 0
+        self._state = self.CLOSED
+        self._half_open_calls = 0
+
+    def record_failure(self):
+        self.total_failures += 1
+        self._consecutive_failures += 1
+        if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._half_open_calls = 0
+        self.times_opened += 1
+
+    def stats(self) -> dict:
+        state = self.state
+        retry_in = None
+        if state == self.OPEN:
+            retry_in = max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+        return {
+            "name": self.name,
+            "state": state,
+            "consecutive_failures": self._consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "recovery_timeout": self.recovery_timeout,
+            "retry_in_seconds": retry_in,
+            "times_opened": self.times_opened,
+            "short_circuited": self.short_circuited,
+            "total_failures": self.total_failures,
+            "total_successes": self.total_successes
+        }
@@ -0,0 +1,50 @@
+import os
+from datetime import timedelta
+from typing import Any, Dict, List
+from database import db
+from models.agent_models import ConflictDetection
+from utils.conflict_detector import ConflictDetector
+from utils.recurrence import NON_RECURRING_FILTER
+from utils.time_utils import parse_stored_datetime
+
+# Neighbors are searched by start time, so events longer than this that begin
+# before the checked event are not seen
+CONFLICT_CHECK_LOOKBACK = timedelta(hours=float(os.getenv("CONFLICT_CHECK_LOOKBACK_HOURS", "24")))
+# Cap on neighbors read for one check
+CONFLICT_CHECK_MAX_NEIGHBORS = int(os.getenv("CONFLICT_CHECK_MAX_NEIGHBORS", "200"))
+# Conflicts are reported for the calendar as a whole, like /api/events lists it
+CONFLICT_CHECK_USER = "calendar"
+
+conflict_detector = ConflictDetector()
+
+def neighbor_query(document: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Stored events that can overlap `document` or sit within the buffer of it.
+    The start range is served by the start index; the end bound and the
+    recurrence filter only run on the rows in that range.
+    """
+    start, end = parse_stored_datetime(document["start"]), parse_stored_datetime(document["end"])
+    buffer = conflict_detector.buffer_time
+    clauses = [
+        {"start": {"$gte": start - buffer - CONFLICT_CHECK_LOOKBACK, "$lt": end + buffer}},
+        {"end": {"$gt": start - buffer}},
+        NON_RECURRING_FILTER
+    ]
+    if document.get("_id") is not None:
+        clauses.append({"_id": {"$ne": document["_id"]}})
+    return {"$and": clauses}
+
+async def check_event_conflicts(document: Dict[str, Any]) -> List[ConflictDetection]:
+    """
+    Overlap and buffer violations of one stored event against its time
+    neighbors, found with a single bounded range query instead of re-running
+    ConflictDetector over the whole calendar. Occurrences of recurring series
+    are not expanded; a series is checked at its stored (first) occurrence.
+    """
+    cursor = db.events.find(neighbor_query(document), {"start": 1, "end": 1}).sort("start", 1).limit(CONFLICT_CHECK_MAX_NEIGHBORS)
+    neighbors = [
+        {"id": str(neighbor["_id"]), "start": neighbor["start"], "end": neighbor["end"]}
+        async for neighbor in cursor
+    ]
+    event = {"id": str(document["_id"]), "start": document["start"], "end": document["end"]}
+    return conflict_detector.detect_event_conflicts(event, neighbors, CONFLICT_CHECK_USER)
@@ -1,9 +1,41 @@
-from datetime import datetime, timedelta
+import logging
+import os
+from datetime import date, datetime, timedelta, timezone
 from typing import List, Dict, Any, Optional
 from models.agent_models import ConflictDetection
 
+# "python" runs the per-rule passes below; "numpy" runs the vectorized engine
+# in utils.conflict_engine_numpy (falls back to "python" without numpy)
+CONFLICT_ENGINE = os.getenv("CONFLICT_ENGINE", "python").lower()
+
+def _utc_naive(value: Any) -> datetime:
+    """Parse an event time (datetime or ISO string) once into a naive UTC datetime"""
+    if isinstance(value, str):
+        if value.endswith('Z'):
+            # Already UTC: parsing without the designator avoids a costly tz conversion
+            return datetime.fromisoformat(value[:-1])
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _event_datetime(value: Any) -> datetime:
+    """An event time as given: ISO strings parsed with their offset, datetimes unchanged"""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return value
+
+def _utc_naive_times(events: List[Dict[str, Any]], field: str) -> List[datetime]:
+    """One field of every event as naive UTC datetimes, skipping the call for values already in that form"""
+    values = [event[field] for event in events]
+    for index, value in enumerate(values):
+        if value.__class__ is not datetime or value.tzinfo is not None:
+            values[index] = _utc_naive(value)
+    return values
+
 class ConflictDetector:
-    def __init__(self):
+    def __init__(self, engine: Optional[str] = None):
+        self.engine = (engine or CONFLICT_ENGINE).lower()
         self.buffer_time = timedelta(minutes=15)  # Default buffer between meetings
         self.max_daily_meetings = 8
         self.max_consecutive_hours = 4
@@ -11,10 +43,23 @@ class ConflictDetector:
     
     def detect_conflicts(self, events: List[Dict[str, Any]], user_id: str) -> List[ConflictDetection]:
         """Detect various types of conflicts in the schedule"""
+        if self.engine == "numpy":
+            try:
+                from utils.conflict_engine_numpy import detect_conflicts_vectorized
+            except ImportError:
+                logging.getLogger("conflict_detector").warning("numpy is not installed; using the python conflict engine")
+                self.engine = "python"
+            else:
+                return detect_conflicts_vectorized(self, events, user_id)
+        return self._detect_conflicts_python(events, user_id)
+    
+    def _detect_conflicts_python(self, events: List[Dict[str, Any]], user_id: str) -> List[ConflictDetection]:
+        """Run each rule as its own pass over the events"""
         conflicts = []
         
-        # Sort events by start time
-        sorted_events = sorted(events, key=lambda x: x['start'])
+        # Sort events by start instant; raw values would order "Z" and offset strings as text
+        starts = _utc_naive_times(events, 'start')
+        sorted_events = [events[index] for index in sorted(range(len(events)), key=starts.__getitem__)]
         
         # Check for time overlaps
         conflicts.extend(self._detect_time_overlaps(sorted_events, user_id))
@@ -31,49 +76,85 @@ class ConflictDetector:
         return conflicts
     
     def _detect_time_overlaps(self, events: List[Dict[str, Any]], user_id: str) -> List[ConflictDetection]:
-        """Detect overlapping events"""
+        """
+        Detect groups of mutually overlapping events with a single sweep.
+
+        Events are visited in start order while tracking the latest end seen so
+        far, so an event that overlaps any earlier event of the current group
+        (not just its predecessor) joins it. Each group is reported once.
+        """
         conflicts = []
+        detected_at = datetime.utcnow()
+        # Parse every time once; naive UTC datetimes then compare without any conversion
+        starts = _utc_naive_times(events, 'start')
+        ends = _utc_naive_times(events, 'end')
+        order = sorted(range(len(events)), key=starts.__getitem__)
         
-        for i in range(len(events) - 1):
-            current_event = events[i]
-            next_event = events[i + 1]
-            
-            current_end = current_event['end']
-            next_start = next_event['start']
-            
-            if isinstance(current_end, str):
-                current_end = datetime.fromisoformat(current_end.replace('Z', '+00:00'))
-            if isinstance(next_start, str):
-                next_start = datetime.fromisoformat(next_start.replace('Z', '+00:00'))
-            
-            if current_end > next_start:
-                conflict = ConflictDetection(
-                    conflict_id=f"overlap_{current_event['id']}_{next_event['id']}",
-                    user_id=user_id,
-                    conflict_type="time_overlap",
-                    affected_events=[current_event['id'], next_event['id']],
-                    severity="high",
-                    detected_at=datetime.utcnow(),
-                    suggested_resolution={
-                        "type": "reschedule",
-                        "options": [
-                            {
-                                "action": "move_second_event",
-                                "new_start": current_end + self.buffer_time,
-                                "reason": "Move second event to avoid overlap"
-                            },
-                            {
-                                "action": "shorten_first_event",
-                                "new_end": next_start - self.buffer_time,
-                                "reason": "Shorten first event to avoid overlap"
-                            }
-                        ]
-                    }
-                )
-                conflicts.append(conflict)
+        # The current group is order[cluster_begin:index]; it is only sliced out when reported
+        cluster_begin = 0
+        cluster_end = None
+        for index, position in enumerate(order):
+            if cluster_end is not None and starts[position] < cluster_end:
+                if ends[position] > cluster_end:
+                    cluster_end = ends[position]
+                continue
+            if index - cluster_begin > 1:
+                cluster = order[cluster_begin:index]
+                conflicts.append(self._overlap_conflict(
+                    [events[member]['id'] for member in cluster], events[cluster[0]]['end'], events[cluster[1]]['start'],
+                    starts[cluster[0]], cluster_end, user_id, detected_at
+                ))
+            cluster_begin = index
+            cluster_end = ends[position]
+        if len(order) - cluster_begin > 1:
+            cluster = order[cluster_begin:]
+            conflicts.append(self._overlap_conflict(
+                [events[member]['id'] for member in cluster], events[cluster[0]]['end'], events[cluster[1]]['start'],
+                starts[cluster[0]], cluster_end, user_id, detected_at
+            ))
         
         return conflicts
     
+    def _overlap_conflict(self, affected: List[str], first_end: Any, second_start: Any, cluster_start: datetime,
+                          cluster_end: datetime, user_id: str, detected_at: datetime) -> ConflictDetection:
+        """
+        Build the conflict for one group of overlapping events (ids in start
+        order). `first_end` and `second_start` are the stored event values, so
+        the options keep the inputs' offsets; cluster bounds are naive UTC.
+        """
+        options = [
+            {
+                "action": "move_second_event",
+                "new_start": _event_datetime(first_end) + self.buffer_time,
+                "reason": "Move second event to avoid overlap"
+            },
+            {
+                "action": "shorten_first_event",
+                "new_end": _event_datetime(second_start) - self.buffer_time,
+                "reason": "Shorten first event to avoid overlap"
+            }
+        ]
+        if len(affected) > 2:
+            options.append({
+                "action": "move_later_events",
+                "new_start": cluster_end + self.buffer_time,
+                "reason": f"Move the other {len(affected) - 1} events after the overlapping block"
+            })
+        return ConflictDetection(
+            conflict_id=f"overlap_{affected[0]}_{affected[-1]}",
+            user_id=user_id,
+            conflict_type="time_overlap",
+            affected_events=affected,
+            severity="high",
+            detected_at=detected_at,
+            suggested_resolution={
+                "type": "reschedule",
+                "cluster_start": cluster_start,
+                "cluster_end": cluster_end,
+                "options": options
+            }
+        )
+    
     def _detect_overbooking(self, events: List[Dict[str, Any]], user_id: str) -> List[ConflictDetection]:
         """Detect days with too many meetings"""
         conflicts = []
@@ -89,26 +170,28 @@ class ConflictDetector:
                 daily_events[date_key] = []
             daily_events[date_key].append(event)
         
-        for date, day_events in daily_events.items():
+        for day, day_events in daily_events.items():
             if len(day_events) > self.max_daily_meetings:
-                conflict = ConflictDetection(
-                    conflict_id=f"overbook_{date}_{user_id}",
-                    user_id=user_id,
-                    conflict_type="overbooked",
-                    affected_events=[e['id'] for e in day_events],
-                    severity="medium",
-                    detected_at=datetime.utcnow(),
-                    suggested_resolution={
-                        "type": "redistribute",
-                        "current_count": len(day_events),
-                        "recommended_count": self.max_daily_meetings,
-                        "suggestion": "Consider moving some meetings to other days"
-                    }
-                )
-                conflicts.append(conflict)
+                conflicts.append(self._overbooking_conflict(day, [e['id'] for e in day_events], user_id, datetime.utcnow()))
         
         return conflicts
     
+    def _overbooking_conflict(self, day: date, affected: List[str], user_id: str, detected_at: datetime) -> ConflictDetection:
+        return ConflictDetection(
+            conflict_id=f"overbook_{day}_{user_id}",
+            user_id=user_id,
+            conflict_type="overbooked",
+            affected_events=affected,
+            severity="medium",
+            detected_at=detected_at,
+            suggested_resolution={
+                "type": "redistribute",
+                "current_count": len(affected),
+                "recommended_count": self.max_daily_meetings,
+                "suggestion": "Consider moving some meetings to other days"
+            }
+        )
+    
     def _detect_burnout_risk(self, events: List[Dict[str, Any]], user_id: str) -> List[ConflictDetection]:
         """Detect potential burnout from too many consecutive hours of meetings"""
         conflicts = []
@@ -125,9 +208,9 @@ class ConflictDetector:
                 daily_events[date_key] = []
             daily_events[date_key].append(event)
         
-        for date, day_events in daily_events.items():
+        for day, day_events in daily_events.items():
             # Sort events by start time
-            day_events.sort(key=lambda x: x['start'])
+            day_events.sort(key=lambda x: _utc_naive(x['start']))
             
             total_meeting_hours = 0
             consecutive_hours = 0
@@ -163,30 +246,34 @@ class ConflictDetector:
             max_consecutive = max(max_consecutive, consecutive_hours)
             
             if total_meeting_hours > self.burnout_threshold or max_consecutive > self.max_consecutive_hours:
-                severity = "critical" if total_meeting_hours > self.burnout_threshold * 1.5 else "high"
-                
-                conflict = ConflictDetection(
-                    conflict_id=f"burnout_{date}_{user_id}",
-                    user_id=user_id,
-                    conflict_type="burnout_risk",
-                    affected_events=[e['id'] for e in day_events],
-                    severity=severity,
-                    detected_at=datetime.utcnow(),
-                    suggested_resolution={
-                        "type": "schedule_breaks",
-                        "total_hours": total_meeting_hours,
-                        "max_consecutive": max_consecutive,
-                        "recommendations": [
-                            "Add 15-minute breaks between meetings",
-                            "Consider moving some meetings to other days",
-                            "Block time for focused work"
-                        ]
-                    }
-                )
-                conflicts.append(conflict)
+                conflicts.append(self._burnout_conflict(
+                    day, [e['id'] for e in day_events], total_meeting_hours, max_consecutive, user_id, datetime.utcnow()
+                ))
         
         return conflicts
     
+    def _burnout_conflict(self, day: date, affected: List[str], total_meeting_hours: float, max_consecutive: float,
+                          user_id: str, detected_at: datetime) -> ConflictDetection:
+        severity = "critical" if total_meeting_hours > self.burnout_threshold * 1.5 else "high"
+        return ConflictDetection(
+            conflict_id=f"burnout_{day}_{user_id}",
+            user_id=user_id,
+            conflict_type="burnout_risk",
+            affected_events=affected,
+            severity=severity,
+            detected_at=detected_at,
+            suggested_resolution={
+                "type": "schedule_breaks",
+                "total_hours": total_meeting_hours,
+                "max_consecutive": max_consecutive,
+                "recommendations": [
+                    "Add 15-minute breaks between meetings",
+                    "Consider moving some meetings to other days",
+                    "Block time for focused work"
+                ]
+            }
+        )
+    
     def _detect_insufficient_buffer(self, events: List[Dict[str, Any]], user_id: str) -> List[ConflictDetection]:
         """Detect meetings with insufficient buffer time"""
         conflicts = []
@@ -206,21 +293,53 @@ class ConflictDetector:
             gap = next_start - current_end
             
             if timedelta(0) < gap < self.buffer_time:
-                conflict = ConflictDetection(
-                    conflict_id=f"buffer_{current_event['id']}_{next_event['id']}",
-                    user_id=user_id,
-                    conflict_type="insufficient_buffer",
-                    affected_events=[current_event['id'], next_event['id']],
-                    severity="low",
-                    detected_at=datetime.utcnow(),
-                    suggested_resolution={
-                        "type": "add_buffer",
-                        "current_gap": gap.total_seconds() / 60,  # minutes
-                        "recommended_gap": self.buffer_time.total_seconds() / 60,
-                        "suggestion": f"Add {self.buffer_time.total_seconds() / 60} minutes buffer between meetings"
-                    }
-                )
-                conflicts.append(conflict)
+                conflicts.append(self._buffer_conflict(
+                    current_event['id'], next_event['id'], gap.total_seconds() / 60, user_id, datetime.utcnow()
+                ))
+        
+        return conflicts
+    
+    def _buffer_conflict(self, current_id: str, next_id: str, gap_minutes: float, user_id: str, detected_at: datetime) -> ConflictDetection:
+        return ConflictDetection(
+            conflict_id=f"buffer_{current_id}_{next_id}",
+            user_id=user_id,
+            conflict_type="insufficient_buffer",
+            affected_events=[current_id, next_id],
+            severity="low",
+            detected_at=detected_at,
+            suggested_resolution={
+                "type": "add_buffer",
+                "current_gap": gap_minutes,
+                "recommended_gap": self.buffer_time.total_seconds() / 60,
+                "suggestion": f"Add {self.buffer_time.total_seconds() / 60} minutes buffer between meetings"
+            }
+        )
+    
+    def detect_event_conflicts(self, event: Dict[str, Any], neighbors: List[Dict[str, Any]], user_id: str) -> List[ConflictDetection]:
+        """
+        Overlap and buffer conflicts between one event and the events around it.
+        Only `event` is compared against each neighbor, so the cost is linear
+        in the neighbors passed rather than in the whole schedule.
+        """
+        conflicts = []
+        detected_at = datetime.utcnow()
+        start, end = _utc_naive(event['start']), _utc_naive(event['end'])
+        for neighbor in sorted(neighbors, key=lambda x: _utc_naive(x['start'])):
+            neighbor_start, neighbor_end = _utc_naive(neighbor['start']), _utc_naive(neighbor['end'])
+            if neighbor_start < end and start < neighbor_end:
+                first, second = (neighbor, event) if neighbor_start <= start else (event, neighbor)
+                conflicts.append(self._overlap_conflict(
+                    [first['id'], second['id']], first['end'], second['start'],
+                    min(start, neighbor_start), max(end, neighbor_end), user_id, detected_at
+                ))
+            elif timedelta(0) < start - neighbor_end < self.buffer_time:
+                conflicts.append(self._buffer_conflict(
+                    neighbor['id'], event['id'], (start - neighbor_end).total_seconds() / 60, user_id, detected_at
+                ))
+            elif timedelta(0) < neighbor_start - end < self.buffer_time:
+                conflicts.append(self._buffer_conflict(
+                    event['id'], neighbor['id'], (neighbor_start - end).total_seconds() / 60, user_id, detected_at
+                ))
         
         return conflicts
     
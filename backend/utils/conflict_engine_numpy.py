@@ -0,0 +1,148 @@
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+import numpy as np
+from models.agent_models import ConflictDetection
+from utils.conflict_detector import _utc_naive
+
+if TYPE_CHECKING:
+    from utils.conflict_detector import ConflictDetector
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_NO_OFFSET = timedelta(0)
+_MICROSECONDS_PER_DAY = 86_400_000_000
+# Meetings separated by at most this much count as one consecutive block
+_CONSECUTIVE_GAP_MINUTES = 30
+
+def epoch_microseconds(events: List[Dict[str, Any]], field: str) -> np.ndarray:
+    """One time field of every event as int64 microseconds since the epoch (UTC)"""
+    values = [event[field] for event in events]
+    if all(value.__class__ is str and value.endswith('Z') for value in values):
+        try:
+            # numpy parses plain ISO timestamps in C, far faster than datetime.fromisoformat
+            return np.array([value[:-1] for value in values], dtype="datetime64[us]").astype(np.int64)
+        except ValueError:
+            pass
+    return np.fromiter(
+        (
+            ((value if value.__class__ is datetime and value.tzinfo is None else _utc_naive(value)) - _EPOCH) // _MICROSECOND
+            for value in values
+        ),
+        dtype=np.int64, count=len(values)
+    )
+
+def _utc_offset(value: Any) -> timedelta:
+    if value.__class__ is str:
+        if value.endswith('Z'):
+            return _NO_OFFSET
+        value = datetime.fromisoformat(value)
+    return value.utcoffset() or _NO_OFFSET
+
+def shared_utc_offset(events: List[Dict[str, Any]], field: str) -> Optional[int]:
+    """
+    The UTC offset (in microseconds) every event's `field` carries, or None
+    when they differ. Naive values count as UTC, like "Z" strings.
+    """
+    offsets = {
+        _NO_OFFSET if value.__class__ is datetime and value.tzinfo is None else _utc_offset(value)
+        for value in (event[field] for event in events)
+    }
+    if len(offsets) > 1:
+        return None
+    return offsets.pop() // _MICROSECOND
+
+def _datetimes(microseconds: np.ndarray) -> List[datetime]:
+    return microseconds.astype("datetime64[us]").tolist()
+
+def _day(day_number: np.int64) -> date:
+    return (_EPOCH + timedelta(days=int(day_number))).date()
+
+def _minutes(microseconds: np.ndarray) -> np.ndarray:
+    # Same rounding as timedelta.total_seconds() / 60 in the python engine
+    return microseconds / 1e6 / 60
+
+def detect_conflicts_vectorized(detector: "ConflictDetector", events: List[Dict[str, Any]], user_id: str) -> List[ConflictDetection]:
+    """
+    Run every ConflictDetector rule over int64 epoch arrays built in one pass.
+
+    Events are sorted once; overlap groups come from a cumulative max of end
+    times, days and consecutive blocks from boundary masks, and per-day
+    counts and hour totals from bincount. bincount adds its weights in input
+    order, so hour totals are bit-for-bit the sums the python engine makes.
+
+    Days are the events' local dates, as in the python engine. When all start
+    times share one UTC offset, shifting by it keeps every day a contiguous
+    run of the sorted times. Mixed offsets (or DST changes inside the
+    schedule) break that, so those schedules go to the python engine.
+    """
+    if not events:
+        return []
+    offset = shared_utc_offset(events, 'start')
+    if offset is None:
+        return detector._detect_conflicts_python(events, user_id)
+    detected_at = datetime.utcnow()
+    starts = epoch_microseconds(events, 'start')
+    ends = epoch_microseconds(events, 'end')
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], ends[order]
+    positions = order.tolist()
+    ids = [events[position]['id'] for position in positions]
+    count = len(ids)
+
+    conflicts = []
+
+    # Overlaps: an event joins the current group when it starts before the
+    # latest end seen so far
+    running_end = np.maximum.accumulate(ends)
+    group_starts = np.flatnonzero(np.concatenate(([True], starts[1:] >= running_end[:-1])))
+    group_sizes = np.diff(np.append(group_starts, count))
+    begins = group_starts[group_sizes > 1]
+    lasts = begins + group_sizes[group_sizes > 1] - 1
+    for begin, last, cluster_start, cluster_end in zip(
+        begins.tolist(), lasts.tolist(), _datetimes(starts[begins]), _datetimes(running_end[lasts])
+    ):
+        conflicts.append(detector._overlap_conflict(
+            ids[begin:last + 1], events[positions[begin]]['end'], events[positions[begin + 1]]['start'],
+            cluster_start, cluster_end, user_id, detected_at
+        ))
+
+    # Days: starts are sorted, so every day is a contiguous run
+    days = (starts + offset) // _MICROSECONDS_PER_DAY
+    new_day = np.concatenate(([True], days[1:] != days[:-1]))
+    day_of = np.cumsum(new_day) - 1
+    day_starts = np.flatnonzero(new_day)
+    day_counts = np.bincount(day_of)
+    durations = (ends - starts) / 1e6 / 3600  # hours
+    day_hours = np.bincount(day_of, weights=durations)
+
+    # Consecutive blocks restart at each day and after a gap over 30 minutes
+    gaps = starts[1:] - ends[:-1]  # each start minus the previous end, reused for buffers
+    new_block = new_day.copy()
+    new_block[1:] |= _minutes(gaps) > _CONSECUTIVE_GAP_MINUTES
+    block_of = np.cumsum(new_block) - 1
+    block_hours = np.bincount(block_of, weights=durations)
+    block_starts = np.flatnonzero(new_block)
+    first_block_of_day = np.searchsorted(block_starts, day_starts)
+    day_max_block = np.maximum.reduceat(block_hours, first_block_of_day)
+
+    day_ends = np.append(day_starts[1:], count)
+    overbooked = np.flatnonzero(day_counts > detector.max_daily_meetings)
+    for day in overbooked.tolist():
+        conflicts.append(detector._overbooking_conflict(
+            _day(days[day_starts[day]]), ids[day_starts[day]:day_ends[day]], user_id, detected_at
+        ))
+
+    at_risk = np.flatnonzero((day_hours > detector.burnout_threshold) | (day_max_block > detector.max_consecutive_hours))
+    for day in at_risk.tolist():
+        conflicts.append(detector._burnout_conflict(
+            _day(days[day_starts[day]]), ids[day_starts[day]:day_ends[day]], float(day_hours[day]), float(day_max_block[day]), user_id, detected_at
+        ))
+
+    # Buffers: positive gaps shorter than the buffer between neighbours
+    buffer = detector.buffer_time // _MICROSECOND
+    short_gaps = np.flatnonzero((gaps > 0) & (gaps < buffer))
+    gap_minutes = _minutes(gaps[short_gaps])
+    for index, minutes in zip(short_gaps.tolist(), gap_minutes.tolist()):
+        conflicts.append(detector._buffer_conflict(ids[index], ids[index + 1], minutes, user_id, detected_at))
+
+    return conflicts
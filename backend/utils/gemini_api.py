@@ -1,16 +1,84 @@
 import os
 import asyncio
+import json
+import logging
+from typing import AsyncIterator, Optional
 import httpx
 from httpx import AsyncClient, ReadTimeout
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.rate_limiter import RateLimitExceeded, RequestGovernor, backoff_delay, parse_retry_after
+
+# Returned instead of raising when every Gemini attempt fails
+GEMINI_FALLBACK_SUMMARY = "Main topic and agenda not available. Please review the meeting details and prepare questions or discussion points relevant to the agenda."
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_API_URL = None
+GEMINI_STREAM_URL = None
 if GEMINI_API_KEY:
     GEMINI_API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={GEMINI_API_KEY}"
+    GEMINI_STREAM_URL = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:streamGenerateContent?alt=sse&key={GEMINI_API_KEY}"
 
-async def generate_gemini_summary(prompt: str) -> str:
-    if not GEMINI_API_KEY or not GEMINI_API_URL:
-        raise RuntimeError("GEMINI_API_KEY is not set in environment variables.")
+# Connection pool settings for the shared Gemini client
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "30"))
+GEMINI_MAX_CONNECTIONS = int(os.getenv("GEMINI_MAX_CONNECTIONS", "20"))
+GEMINI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GEMINI_MAX_KEEPALIVE_CONNECTIONS", "10"))
+GEMINI_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("GEMINI_KEEPALIVE_EXPIRY_SECONDS", "60"))
+GEMINI_HTTP2 = os.getenv("GEMINI_HTTP2", "true").lower() in ("1", "true", "yes")
+
+# Request budget and retry policy for Gemini calls
+GEMINI_RATE_PER_SECOND = float(os.getenv("GEMINI_RATE_PER_SECOND", "5"))
+GEMINI_BURST = int(os.getenv("GEMINI_BURST", "10"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_QUEUE_TIMEOUT_SECONDS = float(os.getenv("GEMINI_QUEUE_TIMEOUT_SECONDS", "2"))
+GEMINI_MAX_ATTEMPTS = int(os.getenv("GEMINI_MAX_ATTEMPTS", "3"))
+GEMINI_RETRY_BASE_DELAY = float(os.getenv("GEMINI_RETRY_BASE_DELAY", "0.5"))
+GEMINI_RETRY_MAX_DELAY = float(os.getenv("GEMINI_RETRY_MAX_DELAY", "8"))
+
+gemini_governor = RequestGovernor(
+    rate_per_second=GEMINI_RATE_PER_SECOND,
+    burst=GEMINI_BURST,
+    max_concurrency=GEMINI_MAX_CONCURRENCY,
+    queue_timeout=GEMINI_QUEUE_TIMEOUT_SECONDS
+)
+
+# Opens after consecutive failed attempts so an outage costs callers nothing but the fallback
+GEMINI_BREAKER_FAILURE_THRESHOLD = int(os.getenv("GEMINI_BREAKER_FAILURE_THRESHOLD", "5"))
+GEMINI_BREAKER_RECOVERY_SECONDS = float(os.getenv("GEMINI_BREAKER_RECOVERY_SECONDS", "30"))
+
+gemini_breaker = CircuitBreaker(
+    "gemini",
+    failure_threshold=GEMINI_BREAKER_FAILURE_THRESHOLD,
+    recovery_timeout=GEMINI_BREAKER_RECOVERY_SECONDS
+)
+
+_gemini_client: Optional[AsyncClient] = None
+
+def get_gemini_client() -> AsyncClient:
+    """Return the process-wide Gemini client, creating it on first use"""
+    global _gemini_client
+    if _gemini_client is None or _gemini_client.is_closed:
+        limits = httpx.Limits(
+            max_connections=GEMINI_MAX_CONNECTIONS,
+            max_keepalive_connections=GEMINI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=GEMINI_KEEPALIVE_EXPIRY_SECONDS
+        )
+        try:
+            _gemini_client = AsyncClient(timeout=GEMINI_TIMEOUT_SECONDS, limits=limits, http2=GEMINI_HTTP2)
+        except ImportError:
+            # http2=True needs the optional h2 package (httpx[http2])
+            logging.getLogger("gemini_api").warning("h2 is not installed; using HTTP/1.1 for Gemini requests")
+            _gemini_client = AsyncClient(timeout=GEMINI_TIMEOUT_SECONDS, limits=limits)
+    return _gemini_client
+
+async def close_gemini_client():
+    """Close the shared Gemini client and its pooled connections"""
+    global _gemini_client
+    if _gemini_client is not None:
+        await _gemini_client.aclose()
+        _gemini_client = None
+
+def build_request_body(prompt: str) -> dict:
+    """Wrap a prompt in the generateContent request body"""
     # Make the prompt even more explicit for Gemini
     detailed_prompt = (
         prompt +
@@ -18,7 +86,7 @@ async def generate_gemini_summary(prompt: str) -> str:
         "Include: context, background, all key points, action items, and a thorough section of questions or discussion points relevant to the agenda. "
         "Use clear bullet points and paragraphs. Be verbose and detailed."
     )
-    body = {
+    return {
         "contents": [
             {
                 "parts": [
@@ -27,54 +95,144 @@ async def generate_gemini_summary(prompt: str) -> str:
             }
         ]
     }
+
+def extract_summary_text(data: dict) -> str:
+    """Pull the generated text out of a (possibly partial) generateContent response"""
+    candidates = data.get("candidates", [])
+    summary = ""
+    if candidates and "content" in candidates[0]:
+        content = candidates[0]["content"]
+        if isinstance(content, dict) and "parts" in content:
+            parts = content["parts"]
+            summary = "\n".join(part.get("text", "") for part in parts if part.get("text"))
+        elif isinstance(content, str):
+            summary = content
+    else:
+        summary = data.get("text", "")
+    return summary
+
+async def generate_gemini_summary(prompt: str) -> str:
+    if not GEMINI_API_KEY or not GEMINI_API_URL:
+        raise RuntimeError("GEMINI_API_KEY is not set in environment variables.")
+    body = build_request_body(prompt)
+    detailed_prompt = body["contents"][0]["parts"][0]["text"]
     import logging
     logger = logging.getLogger("gemini_api")
     import traceback
     try:
-        logger.info("About to create httpx.AsyncClient and send request to Gemini API...")
-        async with AsyncClient(timeout=30) as client:  # Increase timeout to 30 seconds
-            for attempt in range(3):  # Retry logic: 3 attempts
-                try:
+        logger.info("Sending request to Gemini API over the shared client...")
+        client = get_gemini_client()
+        for attempt in range(GEMINI_MAX_ATTEMPTS):
+            retry_after = None
+            # While Gemini is failing, skip the call entirely so callers get their fallback at once
+            gemini_breaker.check()
+            try:
+                # Every attempt needs a slot from the governor; the backoff below sleeps without one
+                async with gemini_governor.slot():
                     logger.info(f"Sending prompt to Gemini (Attempt {attempt + 1}): {detailed_prompt}")
                     response = await client.post(GEMINI_API_URL, json=body)
-                    logger.info(f"Gemini API HTTP status: {response.status_code}")
-                    logger.info(f"Gemini API raw response: {response.text}")
-                    response.raise_for_status()
-                    data = response.json() if isinstance(response, httpx.Response) else await response.json()
-                    logger.info(f"Gemini API response (parsed): {data}")
-                    candidates = data.get("candidates", [])
-                    summary = ""
-                    if candidates and "content" in candidates[0]:
-                        content = candidates[0]["content"]
-                        if isinstance(content, dict) and "parts" in content:
-                            parts = content["parts"]
-                            summary = "\n".join(part.get("text", "") for part in parts if part.get("text"))
-                        elif isinstance(content, str):
-                            summary = content
-                    else:
-                        summary = data.get("text", "")
-                    summary = summary.strip()
-                    if not summary:
-                        raise ValueError("Gemini returned empty summary")
-                    if "question" not in summary.lower() and "discussion" not in summary.lower():
-                        summary += "\n\nPrepare questions or discussion points relevant to the agenda."
-                    return summary
-                except ReadTimeout as timeout_exc:
-                    logger.warning(f"Timeout occurred during Gemini API call (Attempt {attempt + 1}): {timeout_exc}")
-                    if attempt == 2:  # Last attempt
-                        raise
-                except Exception as e:
-                    logger.error(f"Error during Gemini API call (Attempt {attempt + 1}): {repr(e)}")
-                    if attempt == 2:  # Last attempt
-                        raise
+                logger.info(f"Gemini API HTTP status: {response.status_code}")
+                logger.info(f"Gemini API raw response: {response.text}")
+                if response.status_code == 429 or response.status_code >= 500:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                response.raise_for_status()
+                data = response.json() if isinstance(response, httpx.Response) else await response.json()
+                logger.info(f"Gemini API response (parsed): {data}")
+                summary = extract_summary_text(data).strip()
+                if not summary:
+                    raise ValueError("Gemini returned empty summary")
+                if "question" not in summary.lower() and "discussion" not in summary.lower():
+                    summary += "\n\nPrepare questions or discussion points relevant to the agenda."
+                gemini_breaker.record_success()
+                return summary
+            except (RateLimitExceeded, asyncio.CancelledError) as limit_exc:
+                # Rejected locally or abandoned: says nothing about Gemini's health
+                gemini_breaker.release()
+                if isinstance(limit_exc, RateLimitExceeded):
+                    # No slot within the queue-wait budget: give the caller its fallback right away
+                    logger.warning(f"Gemini request rejected by rate limiter (Attempt {attempt + 1}): {limit_exc}")
+                raise
+            except httpx.HTTPStatusError as status_exc:
+                gemini_breaker.record_failure()
+                logger.error(f"Gemini API returned an error (Attempt {attempt + 1}): {repr(status_exc)}")
+                status_code = status_exc.response.status_code
+                if status_code != 429 and status_code < 500:
+                    raise  # Client errors will not succeed on retry
+                if attempt == GEMINI_MAX_ATTEMPTS - 1:  # Last attempt
+                    raise
+            except ReadTimeout as timeout_exc:
+                gemini_breaker.record_failure()
+                logger.warning(f"Timeout occurred during Gemini API call (Attempt {attempt + 1}): {timeout_exc}")
+                if attempt == GEMINI_MAX_ATTEMPTS - 1:  # Last attempt
+                    raise
+            except Exception as e:
+                gemini_breaker.record_failure()
+                logger.error(f"Error during Gemini API call (Attempt {attempt + 1}): {repr(e)}")
+                if attempt == GEMINI_MAX_ATTEMPTS - 1:  # Last attempt
+                    raise
+
+            delay = max(backoff_delay(attempt, GEMINI_RETRY_BASE_DELAY, GEMINI_RETRY_MAX_DELAY), retry_after or 0)
+            if delay > GEMINI_RETRY_MAX_DELAY:
+                raise RuntimeError(f"Gemini asked to retry after {delay:.1f}s, longer than the {GEMINI_RETRY_MAX_DELAY}s budget")
+            logger.info(f"Retrying Gemini request in {delay:.2f}s")
+            await asyncio.sleep(delay)
+    except CircuitOpenError as open_exc:
+        logger.info(f"Skipping Gemini call: {open_exc}")
+        return GEMINI_FALLBACK_SUMMARY
     except Exception as e:
         logger.error(f"Gemini summary generation failed: {repr(e)}")
         logger.error(traceback.format_exc())
         # Fallback to default summary
-        return "Main topic and agenda not available. Please review the meeting details and prepare questions or discussion points relevant to the agenda."
+        return GEMINI_FALLBACK_SUMMARY
+
+async def stream_gemini_summary(prompt: str) -> AsyncIterator[str]:
+    """
+    Yield summary text chunks as Gemini generates them (streamGenerateContent
+    over SSE). This is a single attempt: the caller has usually forwarded
+    part of the output already, so failures are raised rather than retried.
+    """
+    if not GEMINI_API_KEY or not GEMINI_STREAM_URL:
+        raise RuntimeError("GEMINI_API_KEY is not set in environment variables.")
+    logger = logging.getLogger("gemini_api")
+    gemini_breaker.check()
+    client = get_gemini_client()
+    verdict = None
+    try:
+        # The slot is held for the whole stream so it counts against max concurrency
+        async with gemini_governor.slot():
+            async with client.stream("POST", GEMINI_STREAM_URL, json=build_request_body(prompt)) as response:
+                logger.info(f"Gemini streaming HTTP status: {response.status_code}")
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    text = extract_summary_text(json.loads(line[len("data:"):].strip()))
+                    if text:
+                        yield text
+        verdict = "success"
+    except RateLimitExceeded:
+        raise
+    except Exception as e:
+        verdict = "failure"
+        logger.error(f"Gemini streaming failed: {repr(e)}")
+        raise
+    finally:
+        if verdict == "success":
+            gemini_breaker.record_success()
+        elif verdict == "failure":
+            gemini_breaker.record_failure()
+        else:
+            # Rejected locally or abandoned by the consumer
+            gemini_breaker.release()
 
 def summary_generate(prompt: str) -> str:
     """
     Synchronous wrapper for generate_gemini_summary for use in sync code or testing.
     """
-    return asyncio.run(generate_gemini_summary(prompt))
+    async def run():
+        try:
+            return await generate_gemini_summary(prompt)
+        finally:
+            # The shared client is bound to this short-lived event loop
+            await close_gemini_client()
+    return asyncio.run(run())
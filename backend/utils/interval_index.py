@@ -0,0 +1,312 @@
+import os
+import random
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from database import db
+from utils.recurrence import NON_RECURRING_FILTER, expand_recurring_events
+from utils.single_flight import SingleFlight
+from utils.time_utils import parse_stored_datetime
+
+# Calendars (the whole calendar plus one per attendee) kept indexed at once
+FREEBUSY_INDEX_USERS = int(os.getenv("FREEBUSY_INDEX_USERS", "64"))
+# Indexes are rebuilt after this long, bounding staleness from writes made on other workers
+FREEBUSY_INDEX_TTL_SECONDS = float(os.getenv("FREEBUSY_INDEX_TTL_SECONDS", "300"))
+# How far before a window recurring occurrences are expanded, to catch ones running into it
+FREEBUSY_RECURRENCE_LOOKBACK = timedelta(days=1)
+
+Interval = Tuple[float, float, str]  # (start epoch seconds, end epoch seconds, event id)
+
+def to_epoch(value: Any) -> float:
+    return parse_stored_datetime(value).timestamp()
+
+def from_epoch(value: float) -> datetime:
+    return datetime.fromtimestamp(value, tz=timezone.utc)
+
+def merge_intervals(intervals: Iterable[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """Union of (start, end) intervals as sorted, non-overlapping (start, end) pairs"""
+    merged: List[List[float]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+class _Node:
+    __slots__ = ("start", "end", "event_id", "priority", "max_end", "left", "right")
+
+    def __init__(self, start: float, end: float, event_id: str, priority: float):
+        self.start = start
+        self.end = end
+        self.event_id = event_id
+        self.priority = priority
+        self.max_end = end
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+
+
+def _update(node: _Node):
+    max_end = node.end
+    if node.left is not None and node.left.max_end > max_end:
+        max_end = node.left.max_end
+    if node.right is not None and node.right.max_end > max_end:
+        max_end = node.right.max_end
+    node.max_end = max_end
+
+def _rotate_right(node: _Node) -> _Node:
+    left = node.left
+    node.left = left.right
+    _update(node)
+    left.right = node
+    _update(left)
+    return left
+
+def _rotate_left(node: _Node) -> _Node:
+    right = node.right
+    node.right = right.left
+    _update(node)
+    right.left = node
+    _update(right)
+    return right
+
+def _insert(node: Optional[_Node], new: _Node) -> _Node:
+    if node is None:
+        return new
+    if (new.start, new.event_id) < (node.start, node.event_id):
+        node.left = _insert(node.left, new)
+        if node.left.priority > node.priority:
+            return _rotate_right(node)
+    else:
+        node.right = _insert(node.right, new)
+        if node.right.priority > node.priority:
+            return _rotate_left(node)
+    _update(node)
+    return node
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+def _delete(node: Optional[_Node], key: Tuple[float, str]) -> Optional[_Node]:
+    if node is None:
+        return None
+    node_key = (node.start, node.event_id)
+    if key < node_key:
+        node.left = _delete(node.left, key)
+    elif key > node_key:
+        node.right = _delete(node.right, key)
+    else:
+        return _merge(node.left, node.right)
+    _update(node)
+    return node
+
+
+class IntervalTree:
+    """
+    Interval tree over event times: a treap ordered by (start, id) where each
+    node also holds the largest end in its subtree. Inserts and removals are
+    O(log n) expected; an overlap query skips every subtree whose max end is
+    before the window, costing O(log n) plus O(log n) per reported interval.
+    """
+
+    def __init__(self):
+        self._root: Optional[_Node] = None
+        self._intervals: Dict[str, Tuple[float, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def __contains__(self, event_id: str) -> bool:
+        return event_id in self._intervals
+
+    @classmethod
+    def build(cls, intervals: Iterable[Interval]) -> "IntervalTree":
+        """Build a balanced tree from scratch in O(n log n), much faster than n inserts"""
+        tree = cls()
+        items = sorted(intervals, key=lambda interval: (interval[0], interval[2]))
+        if not items:
+            return tree
+        nodes = [_Node(start, end, event_id, 0.0) for start, end, event_id in items]
+        for start, end, event_id in items:
+            tree._intervals[event_id] = (start, end)
+
+        def link(lo: int, hi: int) -> Optional[_Node]:
+            if lo >= hi:
+                return None
+            mid = (lo + hi) // 2
+            node = nodes[mid]
+            node.left = link(lo, mid)
+            node.right = link(mid + 1, hi)
+            return node
+
+        tree._root = link(0, len(nodes))
+        # Hand out random priorities in level order, highest first, so the
+        # balanced shape is a valid treap and later inserts rotate normally
+        level_order = [tree._root]
+        for node in level_order:
+            if node.left is not None:
+                level_order.append(node.left)
+            if node.right is not None:
+                level_order.append(node.right)
+        priorities = sorted((random.random() for _ in level_order), reverse=True)
+        for node, priority in zip(level_order, priorities):
+            node.priority = priority
+        for node in reversed(level_order):
+            _update(node)
+        return tree
+
+    def insert(self, start: float, end: float, event_id: str):
+        """Add an interval, replacing any previous interval of the same event"""
+        self.remove(event_id)
+        self._root = _insert(self._root, _Node(start, end, event_id, random.random()))
+        self._intervals[event_id] = (start, end)
+
+    def remove(self, event_id: str) -> bool:
+        interval = self._intervals.pop(event_id, None)
+        if interval is None:
+            return False
+        self._root = _delete(self._root, (interval[0], event_id))
+        return True
+
+    def overlapping(self, window_start: float, window_end: float) -> List[Interval]:
+        """Intervals with start < window_end and end > window_start, in start order"""
+        found: List[Interval] = []
+
+        def visit(node: Optional[_Node]):
+            if node is None or node.max_end <= window_start:
+                return
+            visit(node.left)
+            if node.start < window_end:
+                if node.end > window_start:
+                    found.append((node.start, node.end, node.event_id))
+                visit(node.right)
+
+        visit(self._root)
+        return found
+
+
+def _attendee_set(document: Dict[str, Any]) -> set:
+    return {attendee.strip().lower() for attendee in document.get("attendees") or [] if attendee}
+
+
+class FreeBusyIndex:
+    """
+    Lazily built interval trees of stored (non-recurring) events: one for the
+    whole calendar (user None) and one per attendee. Trees are built from
+    db.events on first use and then kept current by apply_write() from the
+    event write handlers. Recurring series are expanded per query instead.
+    """
+
+    def __init__(self, max_users: int = FREEBUSY_INDEX_USERS, ttl_seconds: float = FREEBUSY_INDEX_TTL_SECONDS):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._trees: "OrderedDict[Optional[str], Tuple[float, IntervalTree]]" = OrderedDict()
+        # Writes that land while a tree is being built are replayed onto it afterwards
+        self._pending: Dict[Optional[str], List[Tuple[List[str], List[Dict[str, Any]]]]] = {}
+        self._builds = SingleFlight()
+        self.hits = 0
+        self.builds = 0
+
+    async def tree_for(self, user: Optional[str] = None) -> IntervalTree:
+        user = user.strip().lower() if user else None
+        entry = self._trees.get(user)
+        if entry is not None and entry[0] > time.monotonic():
+            self._trees.move_to_end(user)
+            self.hits += 1
+            return entry[1]
+        return await self._builds.do(user, lambda: self._build(user))
+
+    async def _build(self, user: Optional[str]) -> IntervalTree:
+        self._pending[user] = []
+        try:
+            query: Dict[str, Any] = dict(NON_RECURRING_FILTER)
+            if user:
+                query = {"$and": [NON_RECURRING_FILTER, {"attendees": {"$regex": f"^{re.escape(user)}$", "$options": "i"}}]}
+            intervals = []
+            async for document in db.events.find(query, {"start": 1, "end": 1}):
+                intervals.append((to_epoch(document["start"]), to_epoch(document["end"]), str(document["_id"])))
+            tree = IntervalTree.build(intervals)
+            for removed_ids, written in self._pending[user]:
+                self._apply(tree, user, removed_ids, written)
+        finally:
+            self._pending.pop(user, None)
+        self.builds += 1
+        self._trees[user] = (time.monotonic() + self.ttl_seconds, tree)
+        self._trees.move_to_end(user)
+        while len(self._trees) > self.max_users:
+            self._trees.popitem(last=False)
+        return tree
+
+    def apply_write(self, removed: Iterable[Dict[str, Any]] = (), written: Iterable[Dict[str, Any]] = ()):
+        """Reflect deleted (`removed`) and created/updated (`written`) event documents in every loaded tree"""
+        removed_ids = [str(document["_id"]) for document in removed]
+        written = list(written)
+        for user, (_, tree) in self._trees.items():
+            self._apply(tree, user, removed_ids, written)
+        for user, pending in self._pending.items():
+            pending.append((removed_ids, written))
+
+    @staticmethod
+    def _apply(tree: IntervalTree, user: Optional[str], removed_ids: List[str], written: List[Dict[str, Any]]):
+        for event_id in removed_ids:
+            tree.remove(event_id)
+        for document in written:
+            event_id = str(document["_id"])
+            # An update can turn an event into a series or drop this attendee
+            tree.remove(event_id)
+            if document.get("recurrence"):
+                continue
+            if user is None or user in _attendee_set(document):
+                tree.insert(to_epoch(document["start"]), to_epoch(document["end"]), event_id)
+
+    async def busy(self, user: Optional[str], window_start: datetime, window_end: datetime) -> List[Tuple[datetime, datetime]]:
+        """Merged busy intervals within [window_start, window_end), clipped to the window"""
+        return [
+            (from_epoch(start), from_epoch(end))
+            for start, end in await self.busy_epochs([user] if user else None, window_start, window_end)
+        ]
+
+    async def busy_epochs(self, users: Optional[Iterable[str]], window_start: datetime, window_end: datetime) -> List[Tuple[float, float]]:
+        """
+        Union of the busy time of several attendees (None for the whole calendar)
+        as merged epoch-second intervals clipped to the window. Recurring series
+        are expanded once for all of them.
+        """
+        users = sorted({user.strip().lower() for user in users if user}) if users is not None else None
+        lo, hi = window_start.timestamp(), window_end.timestamp()
+        intervals = []
+        for user in users if users is not None else [None]:
+            tree = await self.tree_for(user)
+            intervals.extend((start, end) for start, end, _ in tree.overlapping(lo, hi))
+        for occurrence in await expand_recurring_events(window_start - FREEBUSY_RECURRENCE_LOOKBACK, window_end):
+            if users is not None and _attendee_set(occurrence).isdisjoint(users):
+                continue
+            start, end = to_epoch(occurrence["start"]), to_epoch(occurrence["end"])
+            if start < hi and end > lo:
+                intervals.append((start, end))
+        return [(max(start, lo), min(end, hi)) for start, end in merge_intervals(intervals)]
+
+    def stats(self) -> dict:
+        return {
+            "indexed_calendars": len(self._trees),
+            "indexed_events": sum(len(tree) for _, tree in self._trees.values()),
+            "hits": self.hits,
+            "builds": self.builds
+        }
+
+
+freebusy_index = FreeBusyIndex()
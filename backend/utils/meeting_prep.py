@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional, Tuple
+from pymongo import UpdateOne
+from database import db
+from utils.agenda_cache import agenda_cache
+from utils.change_feed import publish_event_change
+from utils.change_version import bump_events_version, reserve_event_versions, version_stamp
+from utils.gemini_api import GEMINI_FALLBACK_SUMMARY, gemini_breaker, generate_gemini_summary
+from utils.single_flight import SingleFlight
+from utils.summary_cache import is_stored_summary_fresh, prep_input_hash, summary_cache
+from utils.time_utils import parse_stored_datetime
+
+logger = logging.getLogger(__name__)
+
+prep_flights = SingleFlight()
+
+def prep_start(event: dict) -> str:
+    """The event start as a UTC ISO string with its offset, for prep prompts and responses"""
+    start = event.get("start")
+    return parse_stored_datetime(start).isoformat() if start else ""
+
+def template_meeting_prep(title: str, start: str, description: str, attendees: Any) -> list:
+    return [
+        f"Main topic: {title} (Scheduled for {start})",
+        f"Review meeting description: {description if description else 'No description provided.'}",
+        f"Key participants: {', '.join(attendees) if attendees else 'None'}",
+        "Prepare questions or discussion points relevant to the agenda."
+    ]
+
+def build_prep_prompt(title: str, start: str, description: str, attendees: Any) -> str:
+    return f"""
+You are a smart meeting assistant. Based on the following event information, generate a concise, professional bullet-point summary for meeting preparation. Use simple language suitable for quick review before joining a meeting.
+
+Title: {title}
+Date & Time: {start}
+Description: {description}
+Attendees: {', '.join(attendees) if attendees else 'None'}
+
+Output format:
+- Bullet point summary of main topics
+- Any required pre-reading or actions
+- Key stakeholders or participants to keep in mind (if mentioned)
+- Questions the attendee should be ready to answer or ask (make these specific to the description)
+"""
+
+async def generate_meeting_prep(title: str, start: str, description: str, attendees: Any) -> Tuple[list, bool]:
+    """Return prep points and whether they came from Gemini (False means the template fallback)"""
+    prompt = build_prep_prompt(title, start, description, attendees)
+    try:
+        summary = await generate_gemini_summary(prompt)
+        if summary and summary != GEMINI_FALLBACK_SUMMARY:
+            return [line for line in summary.split('\n') if line.strip()], True
+    except Exception as e:
+        # Fallback to default points if Gemini API fails
+        pass
+    return template_meeting_prep(title, start, description, attendees), False
+
+async def load_meeting_prep(event: dict, force: bool = False) -> list:
+    """
+    Return prep points for an event. Gemini is only called when the prompt
+    inputs changed since the stored summary was generated, the cached entry
+    expired, or `force` is set.
+    """
+    title = event.get("title", "")
+    start = prep_start(event)
+    description = event.get("meetingDescription", "")
+    attendees = event.get("attendees", [])
+    input_hash = prep_input_hash(title, start, description, attendees)
+
+    if not force:
+        if is_stored_summary_fresh(event, input_hash):
+            return event["summaryPoints"]
+        cached_points = summary_cache.get(input_hash)
+        if cached_points is not None:
+            await store_summary_points(event, cached_points, input_hash)
+            return cached_points
+
+    summary_points, _ = await generate_prep_once(event, input_hash)
+    return list(summary_points)
+
+async def generate_prep_once(event: dict, input_hash: str) -> Tuple[list, bool]:
+    """
+    Generate and store the prep for an event, coalesced per (event, inputs):
+    concurrent viewers and the prewarm worker share one Gemini call and one
+    write. Every caller can rely on the result being stored when it returns.
+    """
+    async def generate_and_store():
+        summary_points, from_model = await generate_meeting_prep(
+            event.get("title", ""), prep_start(event), event.get("meetingDescription", ""), event.get("attendees", [])
+        )
+        if from_model:
+            summary_cache.put(input_hash, summary_points)
+            await store_summary_points(event, summary_points, input_hash)
+        else:
+            # Template fallbacks are not cached so the next request tries Gemini again
+            await store_summary_points(event, summary_points, None)
+        return summary_points, from_model
+
+    return await prep_flights.do((str(event["_id"]), input_hash), generate_and_store)
+
+def summary_update(summary_points: list, input_hash: Optional[str], version: int) -> dict:
+    return {"$set": {
+        "summaryPoints": summary_points,
+        "summaryHash": input_hash,
+        "summaryGeneratedAt": datetime.utcnow(),
+        **version_stamp(version)
+    }}
+
+async def store_summary_points(event: dict, summary_points: list, input_hash: Optional[str]):
+    version = await reserve_event_versions()
+    await db.events.update_one({"_id": event["_id"]}, summary_update(summary_points, input_hash, version))
+    agenda_cache.invalidate_events([event])
+    await bump_events_version()
+    publish_event_change("summary", {**event, "summaryPoints": summary_points, "version": version})
+
+# Background pre-generation of prep summaries for upcoming meetings
+PREWARM_ENABLED = os.getenv("PREP_PREWARM_ENABLED", "true").lower() in ("1", "true", "yes")
+PREWARM_INTERVAL_SECONDS = float(os.getenv("PREP_PREWARM_INTERVAL_SECONDS", "600"))
+PREWARM_HORIZON_HOURS = float(os.getenv("PREP_PREWARM_HORIZON_HOURS", "24"))
+# Kept below GEMINI_MAX_CONCURRENCY so interactive prep requests still get slots
+PREWARM_CONCURRENCY = int(os.getenv("PREP_PREWARM_CONCURRENCY", "2"))
+PREWARM_WRITE_BATCH = int(os.getenv("PREP_PREWARM_WRITE_BATCH", "25"))
+PREWARM_MAX_EVENTS = int(os.getenv("PREP_PREWARM_MAX_EVENTS", "500"))
+
+PREWARM_PROJECTION = {
+    "title": 1, "start": 1, "meetingDescription": 1, "attendees": 1,
+    "summaryPoints": 1, "summaryHash": 1, "summaryGeneratedAt": 1
+}
+
+async def prewarm_upcoming_summaries(horizon_hours: float = PREWARM_HORIZON_HOURS,
+                                     concurrency: int = PREWARM_CONCURRENCY,
+                                     write_batch: int = PREWARM_WRITE_BATCH,
+                                     max_events: int = PREWARM_MAX_EVENTS) -> dict:
+    """
+    Generate summaries for meetings starting within `horizon_hours` whose
+    summaryPoints are missing or stale, using `concurrency` workers.
+    Generation goes through the same flight as interactive prep requests,
+    which stores the result; summaries already in summary_cache are written
+    with batched bulk_write calls.
+    """
+    now = datetime.now(timezone.utc)
+    stats = {"scanned": 0, "queued": 0, "generated": 0, "skipped": 0, "written": 0}
+
+    queue: asyncio.Queue = asyncio.Queue()
+    cursor = db.events.find(
+        {"start": {"$gte": now, "$lt": now + timedelta(hours=horizon_hours)}},
+        PREWARM_PROJECTION
+    ).sort("start", 1).limit(max_events)
+    async for event in cursor:
+        stats["scanned"] += 1
+        input_hash = prep_input_hash(event.get("title", ""), prep_start(event),
+                                     event.get("meetingDescription", ""), event.get("attendees", []))
+        if not is_stored_summary_fresh(event, input_hash):
+            queue.put_nowait((event, input_hash))
+    stats["queued"] = queue.qsize()
+    if not stats["queued"]:
+        return stats
+
+    pending_writes: List[Tuple[dict, list, str]] = []
+    write_lock = asyncio.Lock()
+
+    async def flush(force: bool = False):
+        async with write_lock:
+            if pending_writes and (force or len(pending_writes) >= write_batch):
+                batch = pending_writes[:]
+                pending_writes.clear()
+                first_version = await reserve_event_versions(len(batch))
+                operations = [
+                    UpdateOne({"_id": event["_id"]}, summary_update(summary_points, input_hash, first_version + offset))
+                    for offset, (event, summary_points, input_hash) in enumerate(batch)
+                ]
+                await db.events.bulk_write(operations, ordered=False)
+                agenda_cache.invalidate_events([event for event, _, _ in batch])
+                await bump_events_version()
+                stats["written"] += len(operations)
+                for offset, (event, summary_points, _) in enumerate(batch):
+                    publish_event_change("summary", {**event, "summaryPoints": summary_points, "version": first_version + offset})
+
+    async def worker():
+        while True:
+            try:
+                event, input_hash = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            if gemini_breaker.state == gemini_breaker.OPEN:
+                # Gemini is down; leave the rest for the next run instead of storing templates
+                stats["skipped"] += 1 + queue.qsize()
+                while not queue.empty():
+                    queue.get_nowait()
+                return
+            cached_points = summary_cache.get(input_hash)
+            if cached_points is None:
+                # Joins (or starts) the flight viewers of this meeting use; the
+                # flight stores its result, so it is not written again below
+                _, from_model = await generate_prep_once(event, input_hash)
+                stats["generated" if from_model else "skipped"] += 1
+                continue
+            pending_writes.append((event, cached_points, input_hash))
+            await flush()
+
+    await asyncio.gather(*[worker() for _ in range(max(1, concurrency))])
+    await flush(force=True)
+    return stats
+
+async def run_prep_prewarm_loop(interval_seconds: float = PREWARM_INTERVAL_SECONDS):
+    """Run prewarm_upcoming_summaries forever, every `interval_seconds`"""
+    while True:
+        try:
+            stats = await prewarm_upcoming_summaries()
+            if stats["queued"]:
+                logger.info(f"Prep prewarm run finished: {stats}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Prep prewarm run failed: {repr(e)}")
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,53 @@
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+from bson import ObjectId
+
+def encode_cursor(start: Any, event_id: Any) -> str:
+    """Encode the (start, _id) keyset position of the last returned event"""
+    # Keep the stored BSON type of start so the resumed comparison matches it
+    if isinstance(start, datetime):
+        payload = {"d": start.isoformat(), "i": str(event_id)}
+    else:
+        payload = {"s": start, "i": str(event_id)}
+    raw = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    """Decode a cursor produced by encode_cursor, raising ValueError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        start = datetime.fromisoformat(payload["d"]) if "d" in payload else payload["s"]
+        event_id = str(payload["i"])
+        # Generated occurrence ids are "<series ObjectId>_<start>"
+        ObjectId(event_id.split("_", 1)[0])
+        return start, event_id
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def keyset_filter(cursor: Optional[str]) -> Dict[str, Any]:
+    """Build the filter that resumes a (start, _id) ascending scan after the cursor"""
+    if not cursor:
+        return {}
+    start, event_id = decode_cursor(cursor)
+    # For an occurrence id this compares against its series id, which is
+    # equivalent because the series master itself is never part of the scan
+    return {
+        "$or": [
+            {"start": {"$gt": start}},
+            {"start": start, "_id": {"$gt": ObjectId(event_id.split("_", 1)[0])}},
+        ]
+    }
+
+def resume_key(cursor: Optional[str]) -> Optional[Tuple[datetime, str]]:
+    """The (UTC start, id) sort key a cursor resumes after, for in-memory merges"""
+    if not cursor:
+        return None
+    start, event_id = decode_cursor(cursor)
+    if isinstance(start, str):
+        start = datetime.fromisoformat(start)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    return start.astimezone(timezone.utc), event_id
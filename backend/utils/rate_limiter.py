@@ -0,0 +1,114 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+class RateLimitExceeded(Exception):
+    """Raised when a request could not get a slot within the queue-wait timeout"""
+    pass
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, deadline: float):
+        """Take one token, waiting no later than the monotonic `deadline`"""
+        try:
+            await asyncio.wait_for(self._lock.acquire(), timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            raise RateLimitExceeded("Request budget exhausted")
+        try:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+                if time.monotonic() + wait > deadline:
+                    raise RateLimitExceeded("Request budget exhausted")
+                await asyncio.sleep(wait)
+        finally:
+            self._lock.release()
+
+
+class RequestGovernor:
+    """
+    Bounds outbound calls by both a requests/sec budget and a max number in
+    flight. Callers that cannot be admitted within `queue_timeout` seconds get
+    RateLimitExceeded instead of queueing indefinitely.
+    """
+
+    def __init__(self, rate_per_second: float, burst: int, max_concurrency: int, queue_timeout: float):
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def slot(self, queue_timeout: Optional[float] = None):
+        deadline = time.monotonic() + (self.queue_timeout if queue_timeout is None else queue_timeout)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise RateLimitExceeded("Too many requests in flight")
+        try:
+            try:
+                await self.bucket.acquire(deadline)
+            except RateLimitExceeded:
+                self.rejected += 1
+                raise
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+        finally:
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "rate_per_second": self.bucket.rate,
+            "rejected": self.rejected
+        }
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter for the given zero-based retry attempt"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
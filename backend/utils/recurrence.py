@@ -0,0 +1,228 @@
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from bson import ObjectId
+from dateutil.rrule import rrulestr
+from database import db
+from utils.time_utils import parse_stored_datetime
+
+logger = logging.getLogger(__name__)
+
+# Shorthands accepted in EventBase.recurrence besides full RRULE strings
+RECURRENCE_ALIASES = {
+    "daily": "FREQ=DAILY",
+    "weekdays": "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR",
+    "weekly": "FREQ=WEEKLY",
+    "biweekly": "FREQ=WEEKLY;INTERVAL=2",
+    "monthly": "FREQ=MONTHLY",
+    "yearly": "FREQ=YEARLY",
+    "annually": "FREQ=YEARLY",
+}
+
+# Matches stored series masters (recurrence holds a non-empty rule)
+RECURRING_FILTER = {"recurrence": {"$type": "string", "$nin": [""]}}
+NON_RECURRING_FILTER = {"$or": [{"recurrence": None}, {"recurrence": ""}]}
+
+def normalize_rule(recurrence: Optional[str]) -> Optional[str]:
+    """Turn a stored recurrence value into an RRULE body, or None if the event does not repeat"""
+    if not recurrence or not recurrence.strip():
+        return None
+    rule = recurrence.strip()
+    alias = RECURRENCE_ALIASES.get(rule.lower())
+    if alias:
+        return alias
+    if rule.upper().startswith("RRULE:"):
+        rule = rule[len("RRULE:"):]
+    return rule
+
+OCCURRENCE_ID_FORMAT = "%Y%m%dT%H%M%SZ"
+
+def occurrence_id(series_id: str, start: datetime) -> str:
+    """Stable id for a generated occurrence of a series"""
+    return f"{series_id}_{start.strftime(OCCURRENCE_ID_FORMAT)}"
+
+def parse_occurrence_id(value: str) -> Optional[Tuple[ObjectId, datetime]]:
+    """The series id and UTC occurrence start encoded by occurrence_id(), or None for any other string"""
+    series_id, _, suffix = value.rpartition("_")
+    if not ObjectId.is_valid(series_id):
+        return None
+    try:
+        start = datetime.strptime(suffix, OCCURRENCE_ID_FORMAT)
+    except ValueError:
+        return None
+    return ObjectId(series_id), start.replace(tzinfo=timezone.utc)
+
+
+class _SeriesEntry:
+    def __init__(self, fingerprint: Tuple, rule):
+        self.fingerprint = fingerprint
+        self.rule = rule
+        self.windows: "OrderedDict[Tuple[datetime, datetime], Tuple[datetime, ...]]" = OrderedDict()
+
+
+class RecurrenceExpander:
+    """
+    Lazily expands recurring series into occurrence start times.
+
+    Parsed rules and expanded windows are cached per series. Entries are
+    keyed by a fingerprint of the series fields, so an edited series is
+    re-expanded even if invalidate() was not called on this worker.
+    """
+
+    def __init__(self, max_series: int = 1024, max_windows_per_series: int = 16):
+        self.max_series = max_series
+        self.max_windows_per_series = max_windows_per_series
+        self._series: "OrderedDict[str, _SeriesEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, series_id: Optional[str] = None):
+        """Drop cached expansions for one series, or for all of them"""
+        if series_id is None:
+            self._series.clear()
+        else:
+            self._series.pop(str(series_id), None)
+
+    def iter_starts(self, series: Dict[str, Any], window_start: datetime, window_end: datetime) -> Iterator[datetime]:
+        """Yield occurrence starts in [window_start, window_end) without materializing the series"""
+        rule = self._entry(series).rule
+        if rule is None:
+            start = parse_stored_datetime(series["start"])
+            if window_start <= start < window_end:
+                yield start
+            return
+        for start in rule.xafter(window_start, inc=True):
+            if start >= window_end:
+                break
+            yield start
+
+    def starts_between(self, series: Dict[str, Any], window_start: datetime, window_end: datetime) -> Tuple[datetime, ...]:
+        """Occurrence starts in [window_start, window_end), served from the window cache when possible"""
+        entry = self._entry(series)
+        key = (window_start, window_end)
+        cached = entry.windows.get(key)
+        if cached is not None:
+            entry.windows.move_to_end(key)
+            self.hits += 1
+            return cached
+        self.misses += 1
+        starts = tuple(self.iter_starts(series, window_start, window_end))
+        entry.windows[key] = starts
+        if len(entry.windows) > self.max_windows_per_series:
+            entry.windows.popitem(last=False)
+        return starts
+
+    def expand(self, series: Dict[str, Any], window_start: datetime, window_end: datetime,
+               overridden: Optional[set] = None) -> List[Dict[str, Any]]:
+        """
+        Build occurrence documents for a series master within a window.
+
+        Starts listed in recurrenceExceptions are cancelled, and starts in
+        `overridden` are skipped because a stored override document replaces them.
+        """
+        series_id = str(series["_id"])
+        series_start = parse_stored_datetime(series["start"])
+        duration = parse_stored_datetime(series["end"]) - series_start
+        skipped = {parse_stored_datetime(value) for value in series.get("recurrenceExceptions") or []}
+        if overridden:
+            skipped |= overridden
+
+        occurrences = []
+        for start in self.starts_between(series, window_start, window_end):
+            if start in skipped:
+                continue
+            occurrence = dict(series)
+            occurrence["_id"] = occurrence_id(series_id, start)
+            occurrence["start"] = start
+            occurrence["end"] = start + duration
+            occurrence["recurringEventId"] = series_id
+            occurrence["originalStart"] = start
+            occurrences.append(occurrence)
+        return occurrences
+
+    def _entry(self, series: Dict[str, Any]) -> _SeriesEntry:
+        series_id = str(series["_id"])
+        fingerprint = (
+            series.get("recurrence"),
+            series.get("start"),
+            tuple(series.get("recurrenceExceptions") or []),
+        )
+        entry = self._series.get(series_id)
+        if entry is not None and entry.fingerprint == fingerprint:
+            self._series.move_to_end(series_id)
+            return entry
+
+        entry = _SeriesEntry(fingerprint, self._parse_rule(series))
+        self._series[series_id] = entry
+        if len(self._series) > self.max_series:
+            self._series.popitem(last=False)
+        return entry
+
+    @staticmethod
+    def _parse_rule(series: Dict[str, Any]):
+        rule = normalize_rule(series.get("recurrence"))
+        if rule is None:
+            return None
+        try:
+            return rrulestr(rule, dtstart=parse_stored_datetime(series["start"]))
+        except (ValueError, TypeError) as e:
+            # Treat an unparseable rule as a single event rather than failing the listing
+            logger.warning(f"Invalid recurrence {rule!r} on event {series.get('_id')}: {e}")
+            return None
+
+
+recurrence_expander = RecurrenceExpander()
+
+async def expand_recurring_events(window_start: datetime, window_end: datetime) -> List[Dict[str, Any]]:
+    """
+    Return generated occurrences of every recurring series that start in
+    [window_start, window_end), sorted by start. Occurrences replaced by an
+    override document (recurringEventId + originalStart) are left out, since
+    the override is stored as a regular event.
+    """
+    window_start = parse_stored_datetime(window_start)
+    window_end = parse_stored_datetime(window_end)
+    series_list = []
+    cursor = db.events.find({**RECURRING_FILTER, "start": {"$lt": window_end}})
+    async for series in cursor:
+        series_list.append(series)
+    if not series_list:
+        return []
+
+    overrides: Dict[str, set] = {}
+    cursor = db.events.find(
+        {
+            "recurringEventId": {"$in": [str(series["_id"]) for series in series_list]},
+            "originalStart": {"$gte": window_start, "$lt": window_end},
+        },
+        {"recurringEventId": 1, "originalStart": 1}
+    )
+    async for override in cursor:
+        overrides.setdefault(override["recurringEventId"], set()).add(parse_stored_datetime(override["originalStart"]))
+
+    occurrences = []
+    for series in series_list:
+        occurrences.extend(recurrence_expander.expand(
+            series, window_start, window_end, overrides.get(str(series["_id"]))
+        ))
+    occurrences.sort(key=lambda occurrence: (occurrence["start"], occurrence["_id"]))
+    return occurrences
+
+async def find_occurrence(series_id: ObjectId, start: datetime) -> Optional[Dict[str, Any]]:
+    """
+    The stored series master `start` is a live (not cancelled) occurrence of,
+    or None. Overrides are not consulted; see find_override().
+    """
+    series = await db.events.find_one({"_id": series_id, **RECURRING_FILTER})
+    if not series:
+        return None
+    if start in {parse_stored_datetime(value) for value in series.get("recurrenceExceptions") or []}:
+        return None
+    if start not in recurrence_expander.iter_starts(series, start, start + timedelta(seconds=1)):
+        return None
+    return series
+
+async def find_override(series_id: ObjectId, start: datetime) -> Optional[Dict[str, Any]]:
+    """The stored override that replaces the occurrence of a series at `start`, if any"""
+    return await db.events.find_one({"recurringEventId": str(series_id), "originalStart": start})
@@ -0,0 +1,246 @@
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from utils.conflict_detector import ConflictDetector
+from utils.interval_index import from_epoch, merge_intervals, to_epoch
+from utils.slot_finder import find_slots
+
+# Wall-clock budget for one optimization run
+OPTIMIZER_TIME_BUDGET_SECONDS = float(os.getenv("OPTIMIZER_TIME_BUDGET_SECONDS", "2"))
+# Meetings are only moved this many days away from their original day
+OPTIMIZER_MAX_SHIFT_DAYS = int(os.getenv("OPTIMIZER_MAX_SHIFT_DAYS", "3"))
+# Hours (UTC) meetings can be moved into
+OPTIMIZER_WORKING_HOURS = (9, 17)
+# Free slots tried per candidate day for each meeting
+OPTIMIZER_SLOTS_PER_DAY = 3
+
+# Penalty per unit of violation; moves are only made when they lower the total
+OVERLAP_PENALTY = 10.0   # per meeting that overlaps an earlier one
+BUFFER_PENALTY = 1.0     # per gap shorter than the buffer
+OVERBOOK_PENALTY = 4.0   # per meeting above the daily maximum
+BURNOUT_PENALTY = 2.0    # per hour above the daily or consecutive limit
+MOVE_PENALTY = 0.5       # per moved meeting, so the plan changes as little as needed
+MOVE_DAY_PENALTY = 0.25  # per day a meeting is moved away from its original day
+
+SECONDS_PER_DAY = 86400
+
+CONFLICT_LABELS = {
+    "time_overlap": "overlapping meeting groups",
+    "overbooked": "overbooked days",
+    "burnout_risk": "days at burnout risk",
+    "insufficient_buffer": "meetings without buffer time"
+}
+
+Interval = Tuple[float, float]  # (start epoch seconds, end epoch seconds)
+
+def _weekday(day: int) -> int:
+    # Day 0 (1970-01-01) was a Thursday
+    return (day + 3) % 7
+
+
+class ScheduleOptimizer:
+    """
+    Greedy-with-repair rescheduling against the ConflictDetector rules.
+
+    Every day gets a penalty for overlaps, short buffers, meetings above the
+    daily maximum and hours above the burnout limits. The optimizer keeps
+    repairing the worst day. It moves one of that day's meetings into a free
+    slot (buffer included) on the same day or a nearby weekday, picking the
+    move that lowers the total penalty most. A move only changes the
+    penalties of the two days it touches, so each candidate is scored without
+    re-checking the whole schedule. It stops when no day can be improved or
+    the time budget runs out.
+    """
+
+    def __init__(self, detector: Optional[ConflictDetector] = None,
+                 time_budget_seconds: float = OPTIMIZER_TIME_BUDGET_SECONDS,
+                 max_shift_days: int = OPTIMIZER_MAX_SHIFT_DAYS,
+                 working_hours: Tuple[int, int] = OPTIMIZER_WORKING_HOURS):
+        self.detector = detector or ConflictDetector()
+        self.time_budget_seconds = time_budget_seconds
+        self.max_shift_days = max_shift_days
+        self.working_hours = working_hours
+        self.buffer_seconds = self.detector.buffer_time.total_seconds()
+
+    def day_penalty(self, intervals: List[Interval]) -> float:
+        """Penalty of one day's meetings (sorted by start) under the detector's rules"""
+        if not intervals:
+            return 0.0
+        detector = self.detector
+        overlaps = short_buffers = 0
+        total_hours = consecutive_hours = max_consecutive = 0.0
+        latest_end = None
+        previous_end = None
+        for start, end in intervals:
+            hours = (end - start) / 3600
+            total_hours += hours
+            if latest_end is not None and start < latest_end:
+                overlaps += 1
+            if previous_end is not None and 0 < start - previous_end < self.buffer_seconds:
+                short_buffers += 1
+            if previous_end is not None and (start - previous_end) / 60 <= 30:
+                consecutive_hours += hours
+            else:
+                max_consecutive = max(max_consecutive, consecutive_hours)
+                consecutive_hours = hours
+            latest_end = end if latest_end is None else max(latest_end, end)
+            previous_end = end
+        max_consecutive = max(max_consecutive, consecutive_hours)
+        return (
+            OVERLAP_PENALTY * overlaps
+            + BUFFER_PENALTY * short_buffers
+            + OVERBOOK_PENALTY * max(0, len(intervals) - detector.max_daily_meetings)
+            + BURNOUT_PENALTY * (max(0.0, total_hours - detector.burnout_threshold)
+                                 + max(0.0, max_consecutive - detector.max_consecutive_hours))
+        )
+
+    def optimize(self, events: List[Dict[str, Any]], now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Reschedule `events` (dicts with event_id, start, end and optionally
+        title) and report both plans, the improvements, an efficiency score
+        and the run time. Meetings that already started are never moved.
+        """
+        started = time.perf_counter()
+        deadline = started + self.time_budget_seconds
+        now_epoch = to_epoch(now or datetime.utcnow())
+
+        original = [(to_epoch(event["start"]), to_epoch(event["end"])) for event in events]
+        current = list(original)
+        movable = [start >= now_epoch for start, _ in original]
+        days: Dict[int, List[int]] = {}
+        for index, (start, _) in enumerate(current):
+            days.setdefault(int(start // SECONDS_PER_DAY), []).append(index)
+        penalties = {day: self.day_penalty(self._intervals(current, members)) for day, members in days.items()}
+
+        stuck = set()
+        while time.perf_counter() < deadline:
+            candidates = [day for day, penalty in penalties.items() if penalty > 0 and day not in stuck]
+            if not candidates:
+                break
+            day = max(candidates, key=penalties.get)
+            move = self._best_move(day, current, original, movable, days, penalties, now_epoch, deadline)
+            if move is None:
+                stuck.add(day)
+                continue
+            index, target_day, interval = move
+            days[day].remove(index)
+            days.setdefault(target_day, []).append(index)
+            current[index] = interval
+            for touched in {day, target_day}:
+                penalties[touched] = self.day_penalty(self._intervals(current, days[touched]))
+                stuck.discard(touched)
+
+        original_schedule = [self._entry(event, interval) for event, interval in zip(events, original)]
+        optimized_schedule = [
+            {**self._entry(event, interval), "moved": interval != before}
+            for event, interval, before in zip(events, current, original)
+        ]
+        moved = sum(entry["moved"] for entry in optimized_schedule)
+        before_conflicts = self._conflicts(events, original)
+        after_conflicts = self._conflicts(events, current)
+        return {
+            "original_schedule": original_schedule,
+            "optimized_schedule": optimized_schedule,
+            "improvements": self._improvements(before_conflicts, after_conflicts, moved, len(events)),
+            "efficiency_score": self._efficiency(after_conflicts, len(events)),
+            "original_efficiency_score": self._efficiency(before_conflicts, len(events)),
+            "moved": moved,
+            "run_time_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+
+    @staticmethod
+    def _intervals(current: List[Interval], members: List[int]) -> List[Interval]:
+        return sorted(current[index] for index in members)
+
+    def _move_cost(self, interval: Interval, original: Interval) -> float:
+        if interval == original:
+            return 0.0
+        shifted_days = abs(int(interval[0] // SECONDS_PER_DAY) - int(original[0] // SECONDS_PER_DAY))
+        return MOVE_PENALTY + MOVE_DAY_PENALTY * shifted_days
+
+    def _target_days(self, index: int, original: List[Interval], now_epoch: float) -> List[int]:
+        home = int(original[index][0] // SECONDS_PER_DAY)
+        today = int(now_epoch // SECONDS_PER_DAY)
+        return [
+            day for day in range(home - self.max_shift_days, home + self.max_shift_days + 1)
+            if day >= today and (_weekday(day) < 5 or day == home)
+        ]
+
+    def _best_move(self, day: int, current: List[Interval], original: List[Interval], movable: List[bool],
+                   days: Dict[int, List[int]], penalties: Dict[int, float], now_epoch: float, deadline: float):
+        """The (event, target day, new interval) that lowers the total penalty most, or None"""
+        best, best_delta = None, -1e-9
+        work_start, work_end = (hours * 3600 for hours in self.working_hours)
+        for index in days[day]:
+            if not movable[index] or time.perf_counter() > deadline:
+                continue
+            start, end = current[index]
+            rest = [member for member in days[day] if member != index]
+            source_delta = self.day_penalty(self._intervals(current, rest)) - penalties[day]
+            current_cost = self._move_cost(current[index], original[index])
+            for target_day in self._target_days(index, original, now_epoch):
+                members = rest if target_day == day else days.get(target_day, [])
+                occupied = self._intervals(current, members)
+                midnight = target_day * SECONDS_PER_DAY
+                window = (max(midnight + work_start, now_epoch), midnight + work_end)
+                if window[0] >= window[1]:
+                    continue
+                slots = find_slots(
+                    merge_intervals(occupied), [window], timedelta(seconds=end - start),
+                    self.detector.buffer_time, OPTIMIZER_SLOTS_PER_DAY, rank="best"
+                )
+                for slot in slots:
+                    interval = (slot["start"].timestamp(), slot["end"].timestamp())
+                    if target_day == day:
+                        delta = self.day_penalty(sorted(occupied + [interval])) - penalties[day]
+                    else:
+                        delta = (source_delta + self.day_penalty(sorted(occupied + [interval]))
+                                 - penalties.get(target_day, 0.0))
+                    delta += self._move_cost(interval, original[index]) - current_cost
+                    if delta < best_delta:
+                        best, best_delta = (index, target_day, interval), delta
+        return best
+
+    @staticmethod
+    def _entry(event: Dict[str, Any], interval: Interval) -> Dict[str, Any]:
+        return {
+            "event_id": event["event_id"],
+            "title": event.get("title"),
+            "start": from_epoch(interval[0]),
+            "end": from_epoch(interval[1])
+        }
+
+    def _conflicts(self, events: List[Dict[str, Any]], intervals: List[Interval]):
+        schedule = [
+            {"id": event["event_id"], "start": from_epoch(start), "end": from_epoch(end)}
+            for event, (start, end) in zip(events, intervals)
+        ]
+        return self.detector.detect_conflicts(schedule, "optimizer")
+
+    @staticmethod
+    def _efficiency(conflicts, total: int) -> float:
+        """Share of meetings not involved in any detected conflict"""
+        if not total:
+            return 1.0
+        affected = {event_id for conflict in conflicts for event_id in conflict.affected_events}
+        return round(1 - len(affected) / total, 3)
+
+    @staticmethod
+    def _improvements(before, after, moved: int, total: int) -> List[str]:
+        counts_before, counts_after = {}, {}
+        for conflicts, counts in ((before, counts_before), (after, counts_after)):
+            for conflict in conflicts:
+                counts[conflict.conflict_type] = counts.get(conflict.conflict_type, 0) + 1
+        improvements = []
+        for conflict_type, label in CONFLICT_LABELS.items():
+            old, new = counts_before.get(conflict_type, 0), counts_after.get(conflict_type, 0)
+            if old != new:
+                improvements.append(f"{'Reduced' if new < old else 'Increased'} {label} from {old} to {new}")
+        if moved:
+            improvements.append(f"Rescheduled {moved} of {total} meetings")
+        elif before:
+            improvements.append("No move within working hours reduced the remaining conflicts")
+        else:
+            improvements.append("Schedule already satisfies every conflict rule")
+        return improvements
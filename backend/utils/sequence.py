@@ -0,0 +1,33 @@
+from typing import Optional
+from pymongo import ReturnDocument
+from database import db
+
+AGENDA_ORDER_SEQUENCE = "agendaOrder"
+
+async def reserve_sequence(name: str, count: int = 1) -> int:
+    """Atomically reserve `count` consecutive values and return the first one.
+
+    Backed by a document per sequence in db.counters, so concurrent API
+    workers never receive the same value.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    counter = await db.counters.find_one_and_update(
+        {"_id": name},
+        {"$inc": {"value": count}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return counter["value"] - count + 1
+
+async def next_sequence(name: str) -> int:
+    """Allocate the next value of a sequence"""
+    return await reserve_sequence(name, 1)
+
+async def seed_sequence(name: str, floor: Optional[int]):
+    """Make sure a sequence continues after `floor` (e.g. the largest value already in use)"""
+    await db.counters.update_one(
+        {"_id": name},
+        {"$max": {"value": floor or 0}},
+        upsert=True
+    )
@@ -0,0 +1,47 @@
+from typing import Any, Dict, Iterable, List
+import orjson
+from fastapi.responses import JSONResponse
+from models.schema import EventDB
+from utils.time_utils import parse_stored_datetime
+
+# Output fields of EventDB with their defaults, computed once from the model
+EVENT_FIELD_DEFAULTS: Dict[str, Any] = {
+    name: field.get_default(call_default_factory=True)
+    for name, field in EventDB.model_fields.items()
+    if name != "id"
+}
+
+# Only fetch what EventDB exposes (_id is always returned by MongoDB)
+EVENT_PROJECTION: Dict[str, int] = {name: 1 for name in EVENT_FIELD_DEFAULTS}
+
+ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+class EventJSONResponse(JSONResponse):
+    """orjson-rendered response for payloads already shaped like EventDB output"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+def serialize_event_document(document: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Trusted-read path: shape a stored event like EventDB's JSON output without
+    running Pydantic validation. Documents written through the API already
+    passed EventCreate/EventUpdate validation, so only start/end (which may be
+    legacy strings or naive BSON dates) and _id need normalizing.
+    """
+    output = {"_id": str(document["_id"])}
+    for name, default in EVENT_FIELD_DEFAULTS.items():
+        value = document.get(name, default)
+        output[name] = default if value is None and default is not None else value
+    output["start"] = parse_stored_datetime(document["start"])
+    output["end"] = parse_stored_datetime(document["end"])
+    return output
+
+def serialize_event_documents(documents: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [serialize_event_document(document) for document in documents]
+
+def event_ndjson_line(document: Dict[str, Any]) -> bytes:
+    """One serialized event as a newline-delimited JSON record"""
+    return orjson.dumps(serialize_event_document(document), option=ORJSON_OPTIONS) + b"\n"
@@ -0,0 +1,103 @@
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import pytz
+from utils.conflict_detector import ConflictDetector
+from utils.interval_index import freebusy_index, from_epoch, merge_intervals
+
+# Slot starts are aligned to this grid (from midnight UTC)
+SLOT_STEP_MINUTES = int(os.getenv("SLOT_STEP_MINUTES", "15"))
+SLOT_MAX_RESULTS = 50
+
+# "earliest" lists slots in time order; "best" takes one slot per free gap and
+# prefers the gaps the meeting fills most tightly, keeping long gaps open
+SLOT_RANKINGS = ("earliest", "best")
+
+def working_windows(window_start: datetime, window_end: datetime, working_start: int, working_end: int,
+                    timezone_name: str = "UTC", include_weekends: bool = False) -> List[Tuple[float, float]]:
+    """Working hours of every day in the window as epoch-second intervals, clipped to the window"""
+    zone = pytz.timezone(timezone_name)
+    lo, hi = window_start.timestamp(), window_end.timestamp()
+    day: date = window_start.astimezone(zone).date()
+    last_day: date = window_end.astimezone(zone).date()
+    windows = []
+    while day <= last_day:
+        if include_weekends or day.weekday() < 5:
+            midnight = datetime(day.year, day.month, day.day)
+            # localize() per boundary keeps working hours right across DST changes
+            start = zone.localize(midnight + timedelta(hours=working_start)).timestamp()
+            end = zone.localize(midnight + timedelta(hours=working_end)).timestamp()
+            if start < hi and end > lo:
+                windows.append((max(start, lo), min(end, hi)))
+        day += timedelta(days=1)
+    return windows
+
+def free_intervals(windows: Iterable[Tuple[float, float]], busy: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """`windows` minus the merged, sorted `busy` intervals, in one forward sweep"""
+    free = []
+    position = 0
+    for window_start, window_end in windows:
+        while position < len(busy) and busy[position][1] <= window_start:
+            position += 1
+        cursor = window_start
+        index = position
+        while index < len(busy) and busy[index][0] < window_end:
+            if busy[index][0] > cursor:
+                free.append((cursor, busy[index][0]))
+            cursor = max(cursor, busy[index][1])
+            index += 1
+        if cursor < window_end:
+            free.append((cursor, window_end))
+    return free
+
+def find_slots(busy: List[Tuple[float, float]], windows: List[Tuple[float, float]], duration: timedelta,
+               buffer: timedelta, limit: int = 5, rank: str = "earliest",
+               step: timedelta = timedelta(minutes=SLOT_STEP_MINUTES)) -> List[Dict[str, Any]]:
+    """
+    Top `limit` slots of `duration` inside `windows` that keep `buffer` clear
+    of every busy interval. `busy` must be merged and sorted (merge_intervals);
+    it is widened by the buffer on both sides before the free gaps are taken.
+    """
+    padding = buffer.total_seconds()
+    padded = merge_intervals((start - padding, end + padding) for start, end in busy)
+    length, grid = duration.total_seconds(), step.total_seconds()
+    slots = []
+    for gap_start, gap_end in free_intervals(windows, padded):
+        start = -(-gap_start // grid) * grid  # first grid point in the gap
+        if start + length > gap_end:
+            continue
+        if rank == "best":
+            # Measured from the grid-aligned start: minutes before it cannot be booked either
+            slots.append((gap_end - start - length, start))
+            continue
+        while start + length <= gap_end and len(slots) < limit:
+            slots.append((0.0, start))
+            start += grid
+        if len(slots) >= limit:
+            break
+    if rank == "best":
+        slots = sorted(slots)[:limit]
+    results = []
+    for spare, start in slots:
+        slot = {"start": from_epoch(start), "end": from_epoch(start + length)}
+        if rank == "best":
+            # Free minutes left in the gap once the meeting is booked
+            slot["spareMinutes"] = round(spare / 60, 1)
+        results.append(slot)
+    return results
+
+async def find_available_slots(attendees: Optional[List[str]], duration: timedelta, window_start: datetime, window_end: datetime,
+                               working_start: int = 9, working_end: int = 17, timezone_name: str = "UTC",
+                               include_weekends: bool = False, limit: int = 5, rank: str = "earliest",
+                               detector: Optional[ConflictDetector] = None) -> List[Dict[str, Any]]:
+    """
+    Free slots shared by every attendee (the whole calendar when none are
+    given), keeping ConflictDetector.buffer_time around existing meetings.
+    Busy time comes from the free/busy interval index, so a search costs one
+    interval-tree query per attendee plus one recurring-series expansion.
+    """
+    buffer = (detector or ConflictDetector()).buffer_time
+    # Meetings just outside the window still need their buffer respected
+    busy = await freebusy_index.busy_epochs(attendees, window_start - buffer, window_end + buffer)
+    windows = working_windows(window_start, window_end, working_start, working_end, timezone_name, include_weekends)
+    return find_slots(busy, windows, duration, buffer, limit, rank)
@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, List, Optional, Tuple
+
+# Bump when the prep prompt changes so earlier summaries are regenerated
+PREP_PROMPT_VERSION = 1
+
+SUMMARY_TTL_SECONDS = int(os.getenv("PREP_SUMMARY_TTL_SECONDS", str(7 * 24 * 3600)))
+SUMMARY_CACHE_SIZE = int(os.getenv("PREP_SUMMARY_CACHE_SIZE", "512"))
+
+def prep_input_hash(title: str, start: Any, description: Optional[str], attendees: Optional[List[str]]) -> str:
+    """Hash of everything that goes into the meeting prep prompt"""
+    payload = json.dumps(
+        [PREP_PROMPT_VERSION, title or "", str(start or ""), description or "", list(attendees or [])],
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def is_stored_summary_fresh(event: dict, input_hash: str, ttl_seconds: int = SUMMARY_TTL_SECONDS) -> bool:
+    """True when the summaryPoints stored on an event were generated from the same inputs within the TTL"""
+    if not event.get("summaryPoints") or event.get("summaryHash") != input_hash:
+        return False
+    generated_at = event.get("summaryGeneratedAt")
+    if not isinstance(generated_at, datetime):
+        return False
+    return datetime.utcnow() - generated_at.replace(tzinfo=None) < timedelta(seconds=ttl_seconds)
+
+
+class SummaryCache:
+    """Size-bounded LRU of prep summary points keyed by prompt input hash, with per-entry TTL"""
+
+    def __init__(self, max_entries: int = SUMMARY_CACHE_SIZE, ttl_seconds: int = SUMMARY_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[List[str]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, points = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return list(points)
+
+    def put(self, key: str, points: List[str]):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, list(points))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Optional[str] = None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+summary_cache = SummaryCache()
@@ -1,6 +1,6 @@
 import os
 import asyncio
-from utils.gemini_api import generate_gemini_summary
+from utils.gemini_api import GEMINI_FALLBACK_SUMMARY, generate_gemini_summary
 
 async def generate_meeting_summary(event_title, event_date_time, event_description, attendees=None):
     prompt = f"""
@@ -19,7 +19,8 @@ Output format:
 """
     try:
         summary = await generate_gemini_summary(prompt)
-        if summary:
+        # The fallback text means Gemini failed or its circuit is open; use the template below
+        if summary and summary != GEMINI_FALLBACK_SUMMARY:
             return [line for line in summary.split('\n') if line.strip()]
     except Exception as e:
         pass
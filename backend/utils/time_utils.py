@@ -14,4 +14,13 @@ def format_datetime(dt: datetime) -> str:
     """Format datetime for client display"""
     if dt.tzinfo is None:
         dt = dt.replace(tzinfo=timezone.utc)
-    return dt.isoformat()
\ No newline at end of file
+    return dt.isoformat()
+
+def parse_stored_datetime(value) -> datetime:
+    """Return a UTC-aware datetime for a stored start/end value (BSON date or legacy ISO string)"""
+    if isinstance(value, str):
+        return to_utc(datetime.fromisoformat(value.replace('Z', '+00:00')))
+    if value.tzinfo is None:
+        # BSON dates are always UTC but come back from the driver as naive datetimes
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
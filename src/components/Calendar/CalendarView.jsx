@@ -7,11 +7,28 @@ import 'react-big-calendar/lib/css/react-big-calendar.css';
 // import 'react-big-calendar/lib/addons/dragAndDrop/styles.css';
 import EventModal from './EventModal';
 import useStore from '../../state/store';
-import { useCalendarData } from '../../hooks/useCalendarData';
+import { toQueryRange, useCalendarData } from '../../hooks/useCalendarData';
 import { fetchEvents } from '../../utils/api';
 import { getEvent } from '../../utils/googleCalendarApi';
 
 const localizer = momentLocalizer(moment);
+
+// Dates the month view shows around `date`, including the leading and trailing weeks
+const monthRange = (date) => ({
+  from: moment(date).startOf('month').startOf('week').toDate(),
+  to: moment(date).endOf('month').endOf('week').add(1, 'ms').toDate(),
+});
+
+// react-big-calendar passes an array of days (day/week views) or { start, end }
+// (month/agenda views), where the end is the last visible day
+const visibleRange = (range) => {
+  const start = Array.isArray(range) ? range[0] : range.start;
+  const end = Array.isArray(range) ? range[range.length - 1] : range.end;
+  return {
+    from: moment(start).startOf('day').toDate(),
+    to: moment(end).startOf('day').add(1, 'day').toDate(),
+  };
+};
 // Removed drag and drop calendar wrapper to fix error
 // const DragAndDropCalendar = withDragAndDrop(Calendar);
 
@@ -27,9 +44,13 @@ const CalendarView = () => {
     deleteExistingEvent,
     // Add a reload function to refresh events
     loadEvents,
-  } = useCalendarData(token);
+    range,
+    loadRange,
+  } = useCalendarData(monthRange(new Date()));
 
   const [view, setView] = useState(Views.MONTH);
+  // Controlled so the calendar keeps its position when it remounts after loading
+  const [date, setDate] = useState(new Date());
   const [selectedEvent, setSelectedEvent] = useState(null);
   const [modalOpen, setModalOpen] = useState(false);
 
@@ -60,6 +81,11 @@ const CalendarView = () => {
     setView(newView);
   }, []);
 
+  // Only load the events of the dates on screen
+  const onRangeChange = useCallback((newRange) => {
+    loadRange(visibleRange(newRange));
+  }, [loadRange]);
+
   const moveEvent = useCallback(({ event, start, end, isAllDay: droppedOnAllDaySlot }) => {
     const updatedEvent = { ...event, start, end, allDay: droppedOnAllDaySlot || event.allDay };
     updateExistingEvent(updatedEvent);
@@ -79,7 +105,7 @@ const CalendarView = () => {
     // Reload events to get fresh data
     await loadEvents();
     // Get fresh events from updated state
-    const freshEvents = await fetchEvents();
+    const freshEvents = await fetchEvents(toQueryRange(range));
     const freshEvent = freshEvents.find(e => e._id === event.id || e.id === event.id) || event;
     setSelectedEvent(freshEvent);
     setModalOpen(false);
@@ -112,6 +138,9 @@ const CalendarView = () => {
         style={{ height: 600 }}
         view={view}
         onView={onViewChange}
+        date={date}
+        onNavigate={setDate}
+        onRangeChange={onRangeChange}
         onSelectEvent={onSelectEvent}
         onSelectSlot={onSelectSlot}
         selectable
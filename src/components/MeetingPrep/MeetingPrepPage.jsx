@@ -2,8 +2,17 @@ import React, { useEffect, useState } from 'react';
 import { useCalendarData } from '../../hooks/useCalendarData';
 import MeetingCard from './MeetingCard';
 
+// Today's local day; a bounded window also brings in occurrences of recurring meetings
+const todayRange = () => {
+  const from = new Date();
+  from.setHours(0, 0, 0, 0);
+  const to = new Date(from);
+  to.setDate(to.getDate() + 1);
+  return { from, to };
+};
+
 const MeetingPrepPage = () => {
-  const { events, loading, error } = useCalendarData();
+  const { events, loading, error } = useCalendarData(todayRange());
   const [todayEvents, setTodayEvents] = useState([]);
 
   useEffect(() => {
@@ -6,16 +6,24 @@ import {
   deleteEvent,
 } from '../utils/api';
 
-export function useCalendarData() {
+// Query window for fetchEvents; null loads every event
+export const toQueryRange = (range) => (range
+  ? { from: range.from.toISOString(), to: range.to.toISOString() }
+  : {});
+
+// `initialRange` ({ from, to } Dates) limits loading to the dates on screen,
+// which also makes the server expand recurring series inside it
+export function useCalendarData(initialRange = null) {
   const [events, setEvents] = useState([]);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
+  const [range, setRange] = useState(initialRange);
 
-  async function loadEvents() {
+  async function loadEvents(nextRange = range) {
     setLoading(true);
     setError(null);
     try {
-      const fetchedEvents = await fetchEvents();
+      const fetchedEvents = await fetchEvents(toQueryRange(nextRange));
       // Normalize _id to id for frontend consistency and ensure dates are Date objects
       const normalizedEvents = fetchedEvents.map(event => ({
         ...event,
@@ -35,6 +43,12 @@ export function useCalendarData() {
     loadEvents();
   }, []);
 
+  // Switch to another window (e.g. after navigating the calendar) and load it
+  const loadRange = (nextRange) => {
+    setRange(nextRange);
+    return loadEvents(nextRange);
+  };
+
   const createNewEvent = async (event) => {
     setLoading(true);
     setError(null);
@@ -93,5 +107,7 @@ export function useCalendarData() {
     updateExistingEvent,
     deleteExistingEvent,
     loadEvents,
+    range,
+    loadRange,
   };
 }
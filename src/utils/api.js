@@ -45,8 +45,26 @@ const apiCall = async (url, options = {}) => {
 };
 
 // Events API
-export const fetchEvents = async () => {
-  return apiCall(`${API_BASE_URL}/events`);
+// Follows the X-Next-Cursor header until every page of the requested window is loaded
+export const fetchEvents = async ({ from, to } = {}) => {
+  const events = [];
+  let cursor = null;
+  do {
+    const params = new URLSearchParams();
+    if (from) params.set('from', from);
+    if (to) params.set('to', to);
+    if (cursor) params.set('cursor', cursor);
+    const query = params.toString();
+    const url = `${API_BASE_URL}/events${query ? `?${query}` : ''}`;
+    const response = await fetch(url, { headers: createHeaders() });
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.detail || `HTTP ${response.status}: ${response.statusText}`);
+    }
+    events.push(...(await response.json()));
+    cursor = response.headers.get('X-Next-Cursor');
+  } while (cursor);
+  return events;
 };
 
 import { toLocalISOString, fromLocalISOString } from './timeUtils';